@@ -0,0 +1,116 @@
+import json
+import os
+import threading
+
+from .clustering import run_clustering
+
+# -------------------------------------------------
+# Precomputed analytics bundle
+# -------------------------------------------------
+# Clustering results only change when build_graph.py rewrites the graph,
+# so the build runs every algorithm with the parameters requested most
+# (the defaults, and agglomerative at each fixed k) and stores the /cluster
+# responses, per-cluster feature analysis included, in
+# static_analytics.json. The bundle is tagged with the version (content
+# hash) of the graph it was computed from. The server answers matching
+# requests with a dictionary lookup; other parameters, or a bundle built
+# from another graph version, fall back to the worker pool. Bundled
+# results carry no "timings": those measured the build, not the request.
+
+ANALYTICS_PATH = os.path.join(os.path.dirname(__file__), "static_analytics.json")
+# 2: results without "timings"
+FORMAT_VERSION = 2
+
+# (algorithm, params) computed at build time, with params as /cluster
+# passes them (see clustering.algorithm_params): {} is the default request
+BUNDLED_RUNS = [
+    ("domain", {}),
+    ("agglomerative", {}),
+    *[("agglomerative", {"k_min": k, "k_max": k}) for k in range(2, 9)],
+    ("spectral", {}),
+    ("spectral", {"n_clusters": "auto"}),
+    ("greedy_modularity", {}),
+    ("louvain", {}),
+]
+
+
+def bundle_key(algorithm, params):
+    return json.dumps([algorithm, sorted(params.items())])
+
+
+def build_bundle(graph, runs=BUNDLED_RUNS):
+    """Bundle for a GraphIndex; runs whose result is an error are left out."""
+    results = []
+    for algorithm, params in runs:
+        result = run_clustering(graph, algorithm, params)
+        if "error" in result:
+            print(f"Skipping {algorithm} {params}: {result['error']}")
+            continue
+        result = {key: value for key, value in result.items() if key != "timings"}
+        results.append({"algorithm": algorithm, "params": params, "result": result})
+    return {"format": FORMAT_VERSION, "graph_version": graph.version, "results": results}
+
+
+def bundle_version(path=ANALYTICS_PATH):
+    """Graph version the bundle at `path` was built from, or None if unusable."""
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data.get("graph_version") if data.get("format") == FORMAT_VERSION else None
+
+
+class AnalyticsBundle:
+    """
+    static_analytics.json as a lookup table, reloaded when its mtime
+    changes. Only answers for the graph version it was built from.
+    """
+
+    def __init__(self, path=ANALYTICS_PATH):
+        self.path = path
+        self.hits = 0
+        self._mtime = None
+        self._version = None
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            data = {}
+            if mtime is not None:
+                try:
+                    with open(self.path, "r") as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    data = {}
+            if data.get("format") != FORMAT_VERSION:
+                data = {}
+            self._results = {
+                bundle_key(entry["algorithm"], entry["params"]): entry["result"]
+                for entry in data.get("results", [])
+            }
+            self._version = data.get("graph_version")
+            self._mtime = mtime
+
+    def get(self, version, algorithm, params):
+        """Bundled /cluster result for this graph version and request, or None."""
+        self.load()
+        if version != self._version:
+            return None
+        result = self._results.get(bundle_key(algorithm, params))
+        if result is not None:
+            self.hits += 1
+        return result
+
+    def stats(self):
+        return {"version": self._version, "results": len(self._results), "hits": self.hits}
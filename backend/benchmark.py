@@ -0,0 +1,327 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+
+from .build_graph import (
+    add_layout, assemble, parse_bots, parse_features, parse_messages, parse_screenshots, serialize,
+)
+from .clustering import ALGORITHMS, preload, run_clustering
+from .graph_store import GraphIndex, GraphStore
+from .incidence import graph_incidence
+from .snapshot import snapshot_bytes
+
+BASE_DIR = Path(__file__).parent.resolve()
+
+# --------------------------------------------------
+# Benchmark harness
+# --------------------------------------------------
+# Times the graph build, graph loading, every /cluster algorithm and the
+# analysis scripts on synthetic annotation datasets of several sizes,
+# and saves the results as JSON so runs can be compared:
+#
+#   python -m backend.benchmark --sizes 12x30,200x60 --out before.json
+#   python -m backend.benchmark --sizes 12x30,200x60 --compare before.json
+#
+# Each size runs in a fresh process, so its memory high-water mark
+# (maxrss) is not inflated by earlier sizes.
+
+DEFAULT_SIZES = "12x30,100x60,500x120"
+# Stages faster than this are too noisy to flag as regressions
+NOISE_FLOOR = 0.005
+
+# --------------------------------------------------
+# Synthetic datasets
+# --------------------------------------------------
+
+FEATURE_HEADER = ["Bot", "Domain", "Class", "Feature Group", "Relation", "Description", "Notes", "Comment", "Code", ""]
+
+
+def write_dataset(out_dir, n_bots, n_features, density=0.25, n_domains=4, seed=0):
+    """
+    Write the four annotation CSVs (same schemas as backend/data) for
+    n_bots bots and n_features features; each bot has each feature with
+    probability `density`. Returns {input name: path}.
+    """
+    rng = random.Random(seed)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = {
+        "bots": out_dir / "final_annotation_bot_description.csv",
+        "features": out_dir / "final_annotation_features.csv",
+        "messages": out_dir / "final_annotation_messages.csv",
+        "screenshots": out_dir / "screenshots.csv",
+    }
+
+    bots = [f"Bot {i:05d}" for i in range(n_bots)]
+    domains = [f"Domain {i}" for i in range(max(1, n_domains))]
+    groups = [f"Group {i}" for i in range(max(1, n_features // 7))]
+    features = [(f"Feature {j:04d}", groups[j % len(groups)]) for j in range(n_features)]
+    bot_domain = {b: domains[i % len(domains)] for i, b in enumerate(bots)}
+    has = {(b, f) for b in bots for f, _ in features if rng.random() < density}
+
+    with paths["bots"].open("w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["Bot", "Description"])
+        for b in bots:
+            w.writerow([b, f"Synthetic chatbot {b}, used for benchmarking."])
+
+    with paths["features"].open("w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(FEATURE_HEADER)
+        for b in bots:
+            for j, (feature, group) in enumerate(features):
+                relation = f"subclass of {features[j - 1][0]}" if j % 5 == 4 else ""
+                w.writerow([
+                    b, bot_domain[b], feature, group, relation,
+                    f"Description of {feature}.", "", "", "x" if (b, feature) in has else "o", "",
+                ])
+
+    with paths["messages"].open("w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["Bot", "Class", "Bot", "User"])
+        for b, feature in sorted(has):
+            if rng.random() < 0.2:
+                w.writerow([b, feature, rng.choice("xo"), rng.choice("xo")])
+
+    with paths["screenshots"].open("w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f, delimiter=";")
+        w.writerow(["Bot", "Class", "Screenshots"])
+        for b, feature in sorted(has):
+            if rng.random() < 0.5:
+                w.writerow([b, feature, f"{b}_{feature}.png".replace(" ", "_")])
+
+    return paths
+
+# --------------------------------------------------
+# Measurement
+# --------------------------------------------------
+
+def maxrss_mb():
+    """Process memory high-water mark so far (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+class Stages:
+    """Runs named stages `repeat` times and records their timings and memory."""
+
+    def __init__(self, repeat=1, trace=False):
+        self.repeat = repeat
+        self.trace = trace
+        self.results = {}
+
+    def run(self, name, func):
+        runs = []
+        peak = None
+        for i in range(self.repeat):
+            # tracemalloc slows Python code down, so only the first run is traced
+            traced = self.trace and i == 0
+            if traced:
+                tracemalloc.start()
+            start = time.perf_counter()
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    value = func()
+            finally:
+                elapsed = time.perf_counter() - start
+                if traced:
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+            runs.append(elapsed)
+
+        result = {
+            "seconds": round(min(runs), 6),
+            "runs": [round(r, 6) for r in runs],
+            "maxrss_mb": maxrss_mb(),
+        }
+        if peak is not None:
+            result["traced_peak_mb"] = round(peak / (1 << 20), 1)
+        if isinstance(value, dict) and "error" in value:
+            result["error"] = value["error"]
+        self.results[name] = result
+        return value
+
+# --------------------------------------------------
+# One size
+# --------------------------------------------------
+
+def bench_size(n_bots, n_features, density, n_domains, seed, repeat, trace, algorithms, data_dir=None):
+    """All stages for one dataset size (run in its own process)."""
+    stages = Stages(repeat, trace)
+    with tempfile.TemporaryDirectory(prefix="grace-bench-") as tmp:
+        work = Path(data_dir or tmp)
+        paths = stages.run("generate", lambda: write_dataset(work, n_bots, n_features, density, n_domains, seed))
+
+        # --- Build (build_graph.py, serial path) ---
+        no_assets = work / "screenshot_assets.json"
+        graph = stages.run("build_parse", lambda: assemble(
+            parse_bots(paths["bots"]),
+            parse_features(paths["features"]),
+            parse_screenshots(paths["screenshots"], no_assets),
+            parse_messages(paths["messages"]),
+        ))
+        stages.run("build_layout", lambda: add_layout(graph))
+        payload = stages.run("build_serialize", lambda: serialize(graph))
+        graph_path = work / "static_graph.json"
+        snapshot_path = work / "static_graph.bin"
+        graph_path.write_bytes(payload)
+        snap = stages.run("build_snapshot", lambda: snapshot_bytes(graph, graph_incidence(graph), graph_path.stat()))
+        snapshot_path.write_bytes(snap)
+
+        # --- Graph load (what the server does on a new version) ---
+        def load(path, snapshot):
+            index = GraphStore(str(path), str(snapshot)).get()
+            index.payload
+            return index
+
+        stages.run("load_json", lambda: load(graph_path, work / "missing.bin"))
+        stages.run("load_snapshot", lambda: load(graph_path, snapshot_path))
+        data = json.loads(payload)
+
+        # --- /cluster, each on a fresh index so shared lookups count too ---
+        # (libraries imported up front, as in a warmed-up worker)
+        preload()
+        for algorithm in algorithms:
+            stages.run(f"cluster_{algorithm}",
+                       lambda: run_clustering(GraphIndex.from_json(data, 0), algorithm))
+
+        # --- Analysis scripts ---
+        from . import analyze_rq, clustering_analysis
+
+        def rq():
+            df, bot_to_domain, domains = analyze_rq.build_data_matrices(data)
+            return analyze_rq.calculate_rq_metrics(df, bot_to_domain, domains)
+
+        stages.run("analyze_rq", rq)
+        stages.run("clustering_analysis",
+                   lambda: clustering_analysis.analyze_clusters(clustering_analysis.build_data_matrices(data)))
+
+    return {
+        "size": f"{n_bots}x{n_features}",
+        "bots": n_bots,
+        "features": n_features,
+        "density": density,
+        "nodes": len(graph["nodes"]),
+        "edges": len(graph["edges"]),
+        "stages": stages.results,
+    }
+
+# --------------------------------------------------
+# Runs and comparison
+# --------------------------------------------------
+
+def parse_sizes(text):
+    sizes = []
+    for part in text.split(","):
+        bots, _, features = part.strip().lower().partition("x")
+        sizes.append((int(bots), int(features or 30)))
+    return sizes
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, threshold):
+    """Print per-stage ratios against a baseline run; returns the regressed stages."""
+    regressions = []
+    previous = {r["size"]: r["stages"] for r in baseline["results"]}
+    for result in current["results"]:
+        old_stages = previous.get(result["size"])
+        if old_stages is None:
+            continue
+        print(f"\n{result['size']} vs baseline ({baseline['meta'].get('commit')})")
+        for name, stage in result["stages"].items():
+            old = old_stages.get(name)
+            if old is None:
+                continue
+            ratio = stage["seconds"] / old["seconds"] if old["seconds"] > 0 else float("inf")
+            slower = ratio > threshold and stage["seconds"] - old["seconds"] > NOISE_FLOOR
+            flag = "  REGRESSION" if slower else ""
+            print(f"  {name:<28} {old['seconds']:>10.4f}s -> {stage['seconds']:>10.4f}s  x{ratio:5.2f}{flag}")
+            if slower:
+                regressions.append((result["size"], name, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the build, graph load, clustering and analysis on synthetic data.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"comma-separated BOTSxFEATURES dataset sizes (default {DEFAULT_SIZES})")
+    parser.add_argument("--density", type=float, default=0.25, help="probability that a bot has a feature")
+    parser.add_argument("--domains", type=int, default=4, help="number of domains")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="runs per stage; the fastest is reported")
+    parser.add_argument("--algorithms", default=",".join(ALGORITHMS),
+                        help="comma-separated /cluster algorithms to time (default: all)")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="also record each stage's traced Python allocation peak (slows the first run)")
+    parser.add_argument("--data-dir", help="keep the generated CSVs and graph files here (last size wins)")
+    parser.add_argument("--out", default="benchmark_results.json", help="where to save the results")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="with --compare: slowdown ratio counted as a regression (exit code 1)")
+    args = parser.parse_args()
+
+    algorithms = [a for a in args.algorithms.split(",") if a]
+    unknown = [a for a in algorithms if a not in ALGORITHMS]
+    if unknown:
+        parser.error(f"unknown algorithms: {', '.join(unknown)}")
+
+    results = []
+    for n_bots, n_features in parse_sizes(args.sizes):
+        print(f"Benchmarking {n_bots} bots x {n_features} features ...", flush=True)
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            result = pool.submit(
+                bench_size, n_bots, n_features, args.density, args.domains, args.seed,
+                args.repeat, args.tracemalloc, algorithms, args.data_dir,
+            ).result()
+        for name, stage in result["stages"].items():
+            error = f"  error: {stage['error']}" if "error" in stage else ""
+            print(f"  {name:<28} {stage['seconds']:>10.4f}s  maxrss {stage['maxrss_mb']:>8.1f} MB{error}")
+        results.append(result)
+
+    run = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    Path(args.out).write_text(json.dumps(run, indent=2) + "\n", encoding="utf-8")
+    print(f"\nResults written to {args.out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(run, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) slower than x{args.threshold}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
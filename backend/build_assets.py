@@ -0,0 +1,146 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image, ImageOps, features
+
+from .build_graph import SCREENSHOT_ASSETS_JSON, iter_screenshots, write_atomic
+
+# --------------------------------------------------
+# Paths
+# --------------------------------------------------
+
+BASE_DIR = Path(__file__).parent.resolve()
+FRONTEND_DIR = BASE_DIR.parent / "frontend"
+SCREENSHOTS_DIR = FRONTEND_DIR / "assets" / "screenshots"
+# Generated files only; anything here not in the manifest is deleted
+DERIVED_DIR = SCREENSHOTS_DIR / "derived"
+
+# --------------------------------------------------
+# Encoding settings
+# --------------------------------------------------
+
+# Thumbnails fit this box: the sidebar shows screenshots at most 500px
+# tall, so this covers 2x displays
+THUMB_BOX = (480, 1000)
+QUALITY = {"webp": 80, "avif": 60}
+# AVIF needs Pillow >= 11.2 built with libavif; WebP is always written
+FORMATS = ["avif", "webp"] if features.check("avif") else ["webp"]
+
+# Part of every content hash; bump it when the settings above change
+PIPELINE_VERSION = "1"
+
+# --------------------------------------------------
+# Helpers
+# --------------------------------------------------
+
+def url_for(path):
+    """URL of a file under frontend/, as the browser requests it."""
+    return path.relative_to(FRONTEND_DIR).as_posix()
+
+def content_hash(path):
+    digest = hashlib.sha256(PIPELINE_VERSION.encode("utf-8"))
+    digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+def encode(image, fmt):
+    buf = io.BytesIO()
+    if fmt == "webp":
+        image.save(buf, "WEBP", quality=QUALITY["webp"], method=6)
+    else:
+        image.save(buf, "AVIF", quality=QUALITY["avif"])
+    return buf.getvalue()
+
+# --------------------------------------------------
+# Per-screenshot variants
+# --------------------------------------------------
+
+def process(name):
+    """
+    Write the thumbnail and full-size variants of one screenshot and
+    return (name, manifest entry). File names carry the content hash, so
+    existing outputs are reused and can be cached forever.
+    """
+    src = SCREENSHOTS_DIR / name
+    digest = content_hash(src)
+    stem = Path(name).stem
+
+    with Image.open(src) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if img.has_transparency_data else "RGB")
+
+        thumb = img.copy()
+        thumb.thumbnail(THUMB_BOX, Image.LANCZOS)
+
+        entry = {
+            "src": url_for(src),
+            "width": img.width,
+            "height": img.height,
+            "thumb": {"width": thumb.width, "height": thumb.height},
+            "full": {},
+        }
+        for variant, image in (("thumb", thumb), ("full", img)):
+            for fmt in FORMATS:
+                out = DERIVED_DIR / f"{stem}.{digest}.{variant}.{fmt}"
+                if not out.exists():
+                    write_atomic(out, encode(image, fmt))
+                entry[variant][fmt] = url_for(out)
+
+    return name, entry
+
+# --------------------------------------------------
+# Build
+# --------------------------------------------------
+
+def build_assets(jobs=1, prune=True):
+    names = sorted({p for _, _, p in iter_screenshots()})
+    missing = [n for n in names if not (SCREENSHOTS_DIR / n).is_file()]
+    for n in missing:
+        print(f"Warning: screenshot not found: {n}")
+    names = [n for n in names if n not in missing]
+
+    DERIVED_DIR.mkdir(parents=True, exist_ok=True)
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            manifest = dict(pool.map(process, names))
+    else:
+        manifest = dict(map(process, names))
+
+    if prune:
+        keep = {
+            Path(url).name
+            for entry in manifest.values()
+            for variant in ("thumb", "full")
+            for key, url in entry[variant].items()
+            if key in FORMATS
+        }
+        for f in DERIVED_DIR.iterdir():
+            if f.is_file() and f.name not in keep:
+                f.unlink()
+
+    payload = (json.dumps(manifest, indent=2, sort_keys=True) + "\n").encode("utf-8")
+    if not SCREENSHOT_ASSETS_JSON.exists() or SCREENSHOT_ASSETS_JSON.read_bytes() != payload:
+        write_atomic(SCREENSHOT_ASSETS_JSON, payload)
+
+    source_bytes = sum((SCREENSHOTS_DIR / n).stat().st_size for n in names)
+    thumb_bytes = sum((FRONTEND_DIR / e["thumb"]["webp"]).stat().st_size for e in manifest.values())
+    print(f"{len(manifest)} screenshots ({', '.join(FORMATS)}): "
+          f"{source_bytes / 1e6:.1f} MB originals, {thumb_bytes / 1e6:.1f} MB WebP thumbnails")
+    print(f"Manifest written to {SCREENSHOT_ASSETS_JSON}; rerun build_graph.py to use it")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build screenshot thumbnails and WebP/AVIF variants from screenshots.csv.")
+    parser.add_argument("--jobs", type=int, default=0,
+                        help="encode in a pool of N processes (default 0 = one per CPU)")
+    parser.add_argument("--no-prune", action="store_true",
+                        help=f"keep files in {DERIVED_DIR.name}/ that the manifest no longer references")
+    args = parser.parse_args()
+
+    build_assets(jobs=args.jobs if args.jobs > 0 else (os.cpu_count() or 1), prune=not args.no_prune)
@@ -1,8 +1,23 @@
+import argparse
 import csv
+import hashlib
+import io
 import json
-from collections import defaultdict
+import os
+import tempfile
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+# Run from the repository root as `python -m backend.build_graph`; the
+# shared modules are imported package-relative, like in the server, so
+# each is loaded once
+from .analytics import build_bundle, bundle_version
+from .graph_store import GraphIndex
+from .incidence import graph_incidence
+from .layout import graph_positions, seeded_positions
+from .snapshot import load_snapshot, snapshot_bytes
+
 # --------------------------------------------------
 # Paths
 # --------------------------------------------------
@@ -15,6 +30,24 @@ BOTS_CSV = BASE_DIR / "data" / "final_annotation_bot_description.csv"
 SCREENSHOTS_CSV = BASE_DIR / "data" / "screenshots.csv"
 
 OUTPUT_JSON = BASE_DIR / "static_graph.json"
+# Written by build_assets.py: screenshot file name -> thumbnail / WebP / AVIF variants
+SCREENSHOT_ASSETS_JSON = BASE_DIR / "screenshot_assets.json"
+# Memory-mapped by the server instead of parsing OUTPUT_JSON (see snapshot.py)
+SNAPSHOT_BIN = BASE_DIR / "static_graph.bin"
+# /cluster results for the common parameters, served without recomputing (see analytics.py)
+ANALYTICS_JSON = BASE_DIR / "static_analytics.json"
+
+# Incremental builds: row hashes of the last build, and the optional delta
+STATE_JSON = BASE_DIR / "static_graph.state.json"
+PATCH_JSON = BASE_DIR / "static_graph.patch.json"
+
+# input name -> (path, csv delimiter)
+INPUTS = {
+    "bots": (BOTS_CSV, ","),
+    "features": (FEATURES_CSV, ","),
+    "messages": (MESSAGES_CSV, ","),
+    "screenshots": (SCREENSHOTS_CSV, ";"),
+}
 
 # --------------------------------------------------
 # Helpers
@@ -55,81 +88,151 @@ def make_edge(source, target, relation, **attrs):
 def is_true(val):
     return str(val).strip().lower() == "x"
 
+def serialize(graph):
+    return json.dumps(graph, indent=2).encode("utf-8")
+
+def temp_for(path):
+    """Temp file next to `path`, with the permissions `path` has (or would get)."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    if path.exists():
+        mode = path.stat().st_mode & 0o777
+    else:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    os.chmod(tmp, mode)
+    return fd, tmp
+
+def write_atomic(path, payload: bytes):
+    """Write via a temp file in the same directory so readers never see a partial file."""
+    fd, tmp = temp_for(path)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
 # --------------------------------------------------
-# Containers
+# Readers
 # --------------------------------------------------
 
-nodes = []
-edges = []
-node_ids = set()
-
-def add_node(node):
-    nid = node["data"]["id"]
-    if nid not in node_ids:
-        nodes.append(node)
-        node_ids.add(nid)
+def iter_dict_rows(path, delimiter=","):
+    with path.open(mode="r", encoding="utf-8", newline="") as f:
+        yield from csv.DictReader(f, delimiter=delimiter)
+
+def iter_message_upgrades(path=MESSAGES_CSV):
+    """(bot_id, feature_id, bot_can, user_can) for rows that grant a permission."""
+    with path.open(mode="r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)  # skip header
+        for row in reader:
+            if len(row) < 4:
+                continue
+            bot_can = is_true(row[2])
+            user_can = is_true(row[3])
+            if bot_can or user_can:
+                yield slugify(row[0]), slugify(row[1]), bot_can, user_can
+
+def iter_screenshots(path=SCREENSHOTS_CSV):
+    """(feature_id, bot_id, path) for every screenshot reference."""
+    for row in iter_dict_rows(path, delimiter=";"):
+        raw_paths = row.get("Screenshots", "").strip()
+        if not raw_paths:
+            continue
+        fid = slugify(row["Class"])
+        bid = slugify(row["Bot"])
+        # Handle comma-separated paths (e.g. "img1.png, img2.png")
+        for p in raw_paths.split(','):
+            p = p.strip()
+            if p:
+                yield fid, bid, p
+
+def load_screenshot_assets(path=SCREENSHOT_ASSETS_JSON):
+    """
+    Variants entry per screenshot file name ({} before build_assets.py has
+    run). Screenshots with an entry are stored as that entry in the graph,
+    the rest as their plain file name.
+    """
+    if not path.exists():
+        return {}
+    with path.open(mode="r", encoding="utf-8") as f:
+        return json.load(f)
+
+def has_feature_edge(bot_id, feature_id, upgrade=None):
+    if upgrade is None:
+        return make_edge(bot_id, feature_id, "hasFeature")
+
+    bot_can, user_can = upgrade
+    if bot_can and user_can:
+        label = "Exchange ⇄"
+    elif bot_can:
+        label = "Bot Output 🤖"
+    else:
+        label = "User Input 👤"
+    return make_edge(
+        bot_id,
+        feature_id,
+        "hasFeature",
+        label=label,
+        bot_can_send=bot_can,
+        user_can_send=user_can
+    )
 
 # --------------------------------------------------
-# Pre-computation: Bot → Domain
+# Partial results
 # --------------------------------------------------
-
-bot_to_domain = {}
-
-with FEATURES_CSV.open(mode="r", encoding="utf-8", newline="") as f:
-    reader = csv.DictReader(f)
-    for row in reader:
+# Each input (or shard of the features CSV) is parsed into a partial
+# result. Partials merge in input order with first-seen / last-wins rules
+# that mirror a single top-to-bottom pass, so any sharding gives the same
+# graph as the serial build.
+
+def parse_bots(path=BOTS_CSV):
+    """(bot_id, label, description) per bot row, in file order."""
+    return [
+        (slugify(row["Bot"]), row["Bot"], row.get("Description", "").strip())
+        for row in iter_dict_rows(path)
+    ]
+
+def parse_messages(path=MESSAGES_CSV):
+    """{(bot_id, feature_id): (bot_can, user_can)}; the last granting row wins."""
+    upgrades = {}
+    for bot_id, feature_id, bot_can, user_can in iter_message_upgrades(path):
+        upgrades[(bot_id, feature_id)] = (bot_can, user_can)
+    return upgrades
+
+def parse_screenshots(path=SCREENSHOTS_CSV, assets_path=SCREENSHOT_ASSETS_JSON):
+    assets = load_screenshot_assets(assets_path)
+    return [(fid, bid, assets.get(p, p)) for fid, bid, p in iter_screenshots(path)]
+
+class FeaturePartial:
+    """What a run of feature CSV rows contributes to the graph."""
+
+    def __init__(self):
+        self.bot_to_domain = {}     # first domain per bot
+        self.group_ids = set()
+        self.nodes = {}             # group / feature nodes, first row per id, first-seen order
+        self.part_of = []           # (feature_id, group_id) for every row
+        self.relations = {}         # feature_id -> (relation, target) of its last row
+        self.has_feature = {}       # (bot_id, feature_id) pairs with Code "x", first-seen order
+
+    def add_row(self, row):
         bot = row.get("Bot", "").strip()
         domain = row.get("Domain", "").strip()
         if bot and domain:
-            bot_id = slugify(bot)
-            bot_to_domain.setdefault(bot_id, domain)
-
-# --------------------------------------------------
-# Bots + Domains
-# --------------------------------------------------
+            self.bot_to_domain.setdefault(slugify(bot), domain)
 
-bots = set()
-
-with BOTS_CSV.open(mode="r", encoding="utf-8", newline="") as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        bot_id = slugify(row["Bot"])
-        bots.add(bot_id)
-
-        add_node(make_node(
-            bot_id,
-            "bot",
-            row["Bot"],
-            description=row.get("Description", "").strip()
-        ))
-
-        domain = bot_to_domain.get(bot_id)
-        if domain:
-            domain_id = slugify(domain)
-            add_node(make_node(domain_id, "domain", domain))
-            edges.append(make_edge(bot_id, domain_id, "partOf"))
-
-# --------------------------------------------------
-# Feature groups + Features
-# --------------------------------------------------
-
-features = {}
-feature_groups = {}
-
-with FEATURES_CSV.open(mode="r", encoding="utf-8", newline="") as f:
-    reader = csv.DictReader(f)
-    for row in reader:
         feature_id = slugify(row["Class"])
         group_label = row["Feature Group"]
         group_id = slugify(group_label)
 
-        if group_id not in feature_groups:
-            feature_groups[group_id] = group_label
-            add_node(make_node(group_id, "feature_group", group_label))
-
-        features[feature_id] = row
+        if group_id not in self.group_ids:
+            self.group_ids.add(group_id)
+            self.nodes.setdefault(group_id, make_node(group_id, "feature_group", group_label))
 
-        add_node(make_node(
+        self.nodes.setdefault(feature_id, make_node(
             feature_id,
             "feature",
             row["Class"],
@@ -138,115 +241,541 @@ with FEATURES_CSV.open(mode="r", encoding="utf-8", newline="") as f:
             **{"class": row["Class"]}
         ))
 
-        edges.append(make_edge(feature_id, group_id, "partOf"))
+        self.part_of.append((feature_id, group_id))
+        self.relations[feature_id] = (row.get("relation", "").strip(), row.get("relation_target", "").strip())
+
+        # Check "Code" column ("x" = has feature)
+        if is_true(row.get("Code", "")):
+            self.has_feature.setdefault((slugify(row.get("Bot", "")), slugify(row.get("Class", ""))), True)
+
+    def merge(self, later):
+        """Append the partial of the rows that follow this one."""
+        for bot_id, domain in later.bot_to_domain.items():
+            self.bot_to_domain.setdefault(bot_id, domain)
+        for nid, node in later.nodes.items():
+            self.nodes.setdefault(nid, node)
+        self.group_ids |= later.group_ids
+        self.part_of.extend(later.part_of)
+        self.relations.update(later.relations)
+        for pair in later.has_feature:
+            self.has_feature.setdefault(pair, True)
+        return self
+
+def parse_features(path=FEATURES_CSV, start=None, stop=None, fieldnames=None):
+    """FeaturePartial for the whole file, or for the records in bytes [start, stop)."""
+    partial = FeaturePartial()
+    if start is None:
+        rows = iter_dict_rows(path)
+    else:
+        with path.open(mode="rb") as f:
+            f.seek(start)
+            text = f.read(stop - start).decode("utf-8")
+        rows = csv.DictReader(io.StringIO(text, newline=""), fieldnames=fieldnames)
+    for row in rows:
+        partial.add_row(row)
+    return partial
+
+def feature_shards(path, n_shards):
+    """
+    Header fields and byte ranges splitting the CSV body into about
+    n_shards runs of whole records. A line ends a record only when the
+    quotes seen so far are balanced (quoted fields may contain newlines).
+    """
+    size = path.stat().st_size
+    with path.open(mode="rb") as f:
+        header = f.readline()
+        fieldnames = next(csv.reader([header.decode("utf-8")]))
+        body_start = pos = f.tell()
+        step = max(1, (size - body_start) // max(1, n_shards))
+
+        cuts = [body_start]
+        quotes = 0
+        for line in f:
+            pos += len(line)
+            quotes += line.count(b'"')
+            if quotes % 2 == 0 and pos - cuts[-1] >= step and pos < size:
+                cuts.append(pos)
+        cuts.append(size)
+
+    return fieldnames, list(zip(cuts[:-1], cuts[1:]))
 
 # --------------------------------------------------
-# Feature ↔ Feature relations
+# Build
 # --------------------------------------------------
 
-for fid, row in features.items():
-    rel = row.get("relation", "").strip()
-    tgt = row.get("relation_target", "").strip()
-    if rel and tgt:
-        tid = slugify(tgt)
-        if tid in features:
-            edges.append(make_edge(fid, tid, rel))
+def assemble(bot_rows, features_part, screenshot_refs, upgrades):
+    """Turn the merged partials into the Cytoscape-style graph dict."""
 
-# --------------------------------------------------
-# Screenshots
-# --------------------------------------------------
+    # --------------------------------------------------
+    # Containers
+    # --------------------------------------------------
 
-screenshots = defaultdict(lambda: defaultdict(list))
+    nodes = []
+    edges = []
+    node_ids = set()
 
-with SCREENSHOTS_CSV.open(mode="r", encoding="utf-8", newline="") as f:
-    reader = csv.DictReader(f, delimiter=";")
-    for row in reader:
-        fid = slugify(row["Class"])
-        bid = slugify(row["Bot"])
-        raw_paths = row.get("Screenshots", "").strip()
-        if fid in features and bid in bots and raw_paths:
-            # Handle comma-separated paths (e.g. "img1.png, img2.png")
-            paths = [p.strip() for p in raw_paths.split(',')]
-            for p in paths:
-                if p:
-                    screenshots[fid][bid].append(p)
-
-for node in nodes:
-    if node["data"]["nodeType"] == "feature":
-        fid = node["data"]["id"]
-        if fid in screenshots:
-            node["data"]["screenshots"] = dict(screenshots[fid])
+    def add_node(node):
+        nid = node["data"]["id"]
+        if nid not in node_ids:
+            nodes.append(node)
+            node_ids.add(nid)
 
-# --------------------------------------------------
-# Bot → Feature edges (base + permissions)
-# --------------------------------------------------
+    # --------------------------------------------------
+    # Bots + Domains
+    # --------------------------------------------------
 
-base_edges = {}
+    bots = set()
 
-# Base hasFeature edges (from FEATURES_CSV)
-with FEATURES_CSV.open(mode="r", encoding="utf-8", newline="") as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        # Check "Code" column ("x" = has feature)
-        if not is_true(row.get("Code", "")):
-            continue
+    for bot_id, label, description in bot_rows:
+        bots.add(bot_id)
 
-        bot_id = slugify(row.get("Bot", ""))
-        feature_id = slugify(row.get("Class", ""))
-        if bot_id in bots and feature_id in features:
-            base_edges[(bot_id, feature_id)] = make_edge(
-                bot_id,
-                feature_id,
-                "hasFeature"
-            )
-
-# Permission upgrades (from MESSAGES_CSV)
-with MESSAGES_CSV.open(mode="r", encoding="utf-8", newline="") as f:
-    reader = csv.reader(f)
-    next(reader, None)  # skip header
-
-    for row in reader:
-        if len(row) < 4:
-            continue
+        add_node(make_node(bot_id, "bot", label, description=description))
 
-        bot_id = slugify(row[0])
-        feature_id = slugify(row[1])
-        bot_can = is_true(row[2])
-        user_can = is_true(row[3])
+        domain = features_part.bot_to_domain.get(bot_id)
+        if domain:
+            domain_id = slugify(domain)
+            add_node(make_node(domain_id, "domain", domain))
+            edges.append(make_edge(bot_id, domain_id, "partOf"))
 
-        if (bot_id, feature_id) not in base_edges:
-            continue
+    # --------------------------------------------------
+    # Feature groups + Features
+    # --------------------------------------------------
+
+    for node in features_part.nodes.values():
+        add_node(node)
+
+    features = features_part.relations  # every feature id, first-seen order
+
+    for feature_id, group_id in features_part.part_of:
+        edges.append(make_edge(feature_id, group_id, "partOf"))
 
-        if bot_can or user_can:
-            if bot_can and user_can:
-                label = "Exchange ⇄"
-            elif bot_can:
-                label = "Bot Output 🤖"
-            else:
-                label = "User Input 👤"
-
-            base_edges[(bot_id, feature_id)] = make_edge(
-                bot_id,
-                feature_id,
-                "hasFeature",
-                label=label,
-                bot_can_send=bot_can,
-                user_can_send=user_can
-            )
-
-# Emit hasFeature edges exactly once
-edges.extend(base_edges.values())
+    # --------------------------------------------------
+    # Feature ↔ Feature relations
+    # --------------------------------------------------
+
+    for fid, (rel, tgt) in features.items():
+        if rel and tgt:
+            tid = slugify(tgt)
+            if tid in features:
+                edges.append(make_edge(fid, tid, rel))
+
+    # --------------------------------------------------
+    # Screenshots
+    # --------------------------------------------------
+
+    screenshots = defaultdict(lambda: defaultdict(list))
+
+    for fid, bid, p in screenshot_refs:
+        if fid in features and bid in bots:
+            screenshots[fid][bid].append(p)
+
+    for node in nodes:
+        if node["data"]["nodeType"] == "feature":
+            fid = node["data"]["id"]
+            if fid in screenshots:
+                node["data"]["screenshots"] = dict(screenshots[fid])
+
+    # --------------------------------------------------
+    # Bot → Feature edges (base + permissions)
+    # --------------------------------------------------
+
+    # Emit hasFeature edges exactly once, upgraded by MESSAGES_CSV permissions
+    for bot_id, feature_id in features_part.has_feature:
+        if bot_id in bots and feature_id in features:
+            edges.append(has_feature_edge(bot_id, feature_id, upgrades.get((bot_id, feature_id))))
+
+    return {
+        "nodes": nodes,
+        "edges": edges
+    }
+
+def build_graph(jobs=1, previous=None):
+    """
+    Build the full Cytoscape-style graph dict from the CSV inputs.
+
+    With jobs > 1 the four CSVs are parsed concurrently in a process pool
+    and the features CSV is split into `jobs` shards; the result is the
+    same as the serial build. Nodes carry the default layout as their
+    Cytoscape "position"; with `previous` positions ({id: position}),
+    existing nodes keep theirs (see add_layout).
+    """
+    if jobs <= 1:
+        return add_layout(assemble(parse_bots(), parse_features(), parse_screenshots(), parse_messages()), previous)
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        bots_f = pool.submit(parse_bots, BOTS_CSV)
+        messages_f = pool.submit(parse_messages, MESSAGES_CSV)
+        screenshots_f = pool.submit(parse_screenshots, SCREENSHOTS_CSV)
+
+        fieldnames, ranges = feature_shards(FEATURES_CSV, jobs)
+        shard_fs = [
+            pool.submit(parse_features, FEATURES_CSV, start, stop, fieldnames)
+            for start, stop in ranges
+        ]
+
+        features_part = FeaturePartial()
+        for fut in shard_fs:
+            features_part.merge(fut.result())
+
+        return add_layout(assemble(bots_f.result(), features_part, screenshots_f.result(), messages_f.result()), previous)
+
+def add_layout(graph, previous=None):
+    """
+    Store the default layout in the nodes. Given the previous build's
+    positions, nodes that still exist keep them and only new ones are
+    placed, so unchanged nodes stay unchanged (also in --patch output).
+    """
+    positions = seeded_positions(graph, previous) if previous else graph_positions(graph)
+    for node in graph["nodes"]:
+        node["position"] = positions[node["data"]["id"]]
+    return graph
 
 # --------------------------------------------------
-# Write graph
+# Streaming build
 # --------------------------------------------------
+# Same nodes and edges, in the same order, as build_graph(), but each CSV
+# is read once and elements are written out as soon as they are final.
+# Only per-entity lookups stay in memory (bots, domains, feature ids,
+# message upgrades, screenshot paths and the seen bot/feature pairs);
+# per-row output is spooled to temporary files instead of lists.
+# The layout needs the whole graph, so streamed nodes carry no "position"
+# and the frontend falls back to laying them out itself.
+
+class ElementWriter:
+    """Writes nodes and edges as compact JSON ({"nodes": [...], "edges": [...]}) or JSON Lines."""
+
+    def __init__(self, out, fmt="json"):
+        self.out = out
+        self.fmt = fmt
+        self.section = None
+        self.first = True
+
+    def begin(self, section):
+        if self.fmt == "json":
+            self.out.write('{"nodes":[' if section == "nodes" else '],"edges":[')
+        self.section = section
+        self.first = True
+
+    def write(self, element):
+        if self.fmt == "jsonl":
+            line = {"group": self.section}
+            line.update(element)
+            self.out.write(json.dumps(line, separators=(",", ":")) + "\n")
+            return
+        if not self.first:
+            self.out.write(",")
+        self.out.write(json.dumps(element, separators=(",", ":")))
+        self.first = False
+
+    def copy_spool(self, spool):
+        spool.seek(0)
+        for line in spool:
+            self.write(json.loads(line))
+
+    def end(self):
+        if self.fmt == "json":
+            self.out.write("]}")
+
+def spool_write(spool, element):
+    spool.write(json.dumps(element, separators=(",", ":")) + "\n")
+
+def stream_graph(out, fmt="json"):
+    """Single pass over every CSV, writing the graph to the text stream `out`."""
+
+    # Small lookups first: permission upgrades (last matching row wins)
+    # and screenshot paths per feature/bot
+    upgrades = {}
+    for bot_id, feature_id, bot_can, user_can in iter_message_upgrades():
+        upgrades[(bot_id, feature_id)] = (bot_can, user_can)
+
+    assets = load_screenshot_assets()
+    screenshots = defaultdict(lambda: defaultdict(list))
+    for fid, bid, p in iter_screenshots():
+        screenshots[fid][bid].append(assets.get(p, p))
+
+    # Bot rows are needed before the features pass (hasFeature checks),
+    # but their domain comes from the features CSV
+    bot_rows = [
+        (slugify(row["Bot"]), row["Bot"], row.get("Description", "").strip())
+        for row in iter_dict_rows(BOTS_CSV)
+    ]
+    bots = {bot_id for bot_id, _, _ in bot_rows}
+
+    bot_to_domain = {}
+    node_ids = set(bots)
+    feature_groups = set()
+    features = set()
+    relations = {}
+    seen_pairs = set()
+
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as feature_nodes, \
+         tempfile.TemporaryFile("w+", encoding="utf-8") as part_of_edges, \
+         tempfile.TemporaryFile("w+", encoding="utf-8") as has_feature_edges:
+
+        for row in iter_dict_rows(FEATURES_CSV):
+            bot = row.get("Bot", "").strip()
+            domain = row.get("Domain", "").strip()
+            if bot and domain:
+                bot_to_domain.setdefault(slugify(bot), domain)
+
+            feature_id = slugify(row["Class"])
+            group_label = row["Feature Group"]
+            group_id = slugify(group_label)
+
+            if group_id not in feature_groups:
+                feature_groups.add(group_id)
+                if group_id not in node_ids:
+                    node_ids.add(group_id)
+                    spool_write(feature_nodes, make_node(group_id, "feature_group", group_label))
+
+            features.add(feature_id)
+
+            if feature_id not in node_ids:
+                node_ids.add(feature_id)
+                node = make_node(
+                    feature_id,
+                    "feature",
+                    row["Class"],
+                    row.get("Description", "").strip(),
+                    groupId=group_id,
+                    **{"class": row["Class"]}
+                )
+                shots = {bid: paths for bid, paths in screenshots.get(feature_id, {}).items() if bid in bots}
+                if shots:
+                    node["data"]["screenshots"] = shots
+                spool_write(feature_nodes, node)
+
+            spool_write(part_of_edges, make_edge(feature_id, group_id, "partOf"))
+
+            # Feature ↔ Feature relation of the last row per feature
+            relations[feature_id] = (row.get("relation", "").strip(), row.get("relation_target", "").strip())
+
+            # hasFeature, merged with its permission upgrade; first row per pair wins the slot
+            if is_true(row.get("Code", "")):
+                bot_id = slugify(row.get("Bot", ""))
+                pair = (bot_id, feature_id)
+                if bot_id in bots and pair not in seen_pairs:
+                    seen_pairs.add(pair)
+                    spool_write(has_feature_edges, has_feature_edge(bot_id, feature_id, upgrades.get(pair)))
+
+        writer = ElementWriter(out, fmt)
+
+        # --- Nodes ---
+        writer.begin("nodes")
+        written = set()
+        for bot_id, label, description in bot_rows:
+            if bot_id not in written:
+                written.add(bot_id)
+                writer.write(make_node(bot_id, "bot", label, description=description))
+            domain = bot_to_domain.get(bot_id)
+            if domain and slugify(domain) not in written:
+                written.add(slugify(domain))
+                writer.write(make_node(slugify(domain), "domain", domain))
+        writer.copy_spool(feature_nodes)
+
+        # --- Edges ---
+        writer.begin("edges")
+        for bot_id, _, _ in bot_rows:
+            domain = bot_to_domain.get(bot_id)
+            if domain:
+                writer.write(make_edge(bot_id, slugify(domain), "partOf"))
+        writer.copy_spool(part_of_edges)
+        for fid, (rel, tgt) in relations.items():
+            if rel and tgt and slugify(tgt) in features:
+                writer.write(make_edge(fid, slugify(tgt), rel))
+        writer.copy_spool(has_feature_edges)
+        writer.end()
 
-graph = {
-    "nodes": nodes,
-    "edges": edges
-}
-
-with OUTPUT_JSON.open(mode="w", encoding="utf-8") as f:
-    json.dump(graph, f, indent=2)
+# --------------------------------------------------
+# Incremental builds
+# --------------------------------------------------
+# Row hashes only decide whether anything changed: if any row did, the
+# whole graph is rebuilt (first-seen and last-wins rules across rows make
+# per-row regeneration unsafe). --patch then carries only the elements
+# that actually differ, and unchanged nodes keep their layout positions.
+
+def row_hashes(path, delimiter):
+    """One short content hash per CSV row (header included), in file order."""
+    hashes = []
+    with path.open(mode="r", encoding="utf-8", newline="") as f:
+        for row in csv.reader(f, delimiter=delimiter):
+            hashes.append(hashlib.sha1("\x1f".join(row).encode("utf-8")).hexdigest()[:16])
+    return hashes
+
+def load_state():
+    if not STATE_JSON.exists():
+        return None
+    with STATE_JSON.open(mode="r", encoding="utf-8") as f:
+        return json.load(f)
+
+def changed_rows(previous, current):
+    """Number of rows added or removed between two row-hash lists."""
+    diff = Counter(current)
+    diff.subtract(Counter(previous))
+    return sum(abs(n) for n in diff.values())
+
+def group_by_id(elements):
+    # Ids are not unique (a feature's partOf edge is emitted once per row)
+    grouped = {}
+    for el in elements:
+        grouped.setdefault(el["data"]["id"], []).append(el)
+    return grouped
+
+def diff_elements(old, new):
+    """Elements to upsert (every copy of a new or changed id) and ids to remove."""
+    old_by_id = group_by_id(old)
+    new_by_id = group_by_id(new)
+
+    upsert = []
+    for eid, els in new_by_id.items():
+        if old_by_id.get(eid) != els:
+            upsert.extend(els)
+    remove = [eid for eid in old_by_id if eid not in new_by_id]
+    return {"upsert": upsert, "remove": remove}
+
+def make_patch(old_graph, new_graph, base, target):
+    """
+    Delta between two builds. To apply: drop every element whose id is in
+    "remove" or among the upserted ids, then add the upserted elements.
+    """
+    return {
+        "base": base,
+        "target": target,
+        "nodes": diff_elements(old_graph["nodes"], new_graph["nodes"]),
+        "edges": diff_elements(old_graph["edges"], new_graph["edges"]),
+    }
 
-print(f"Graph written to {OUTPUT_JSON}")
+def file_hash(path):
+    digest = hashlib.sha256()
+    with path.open(mode="rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def write_streamed(path, fmt):
+    """Stream the graph to a temp file; replace `path` only if the bytes differ."""
+    fd, tmp = temp_for(path)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+            stream_graph(f, fmt)
+        tmp_path = Path(tmp)
+        if path.exists() and file_hash(path) == file_hash(tmp_path):
+            os.unlink(tmp)
+            return False
+        os.replace(tmp, path)
+        return True
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+def snapshot_current():
+    return load_snapshot(SNAPSHOT_BIN, OUTPUT_JSON) is not None
+
+def write_snapshot(graph):
+    """Write static_graph.bin for the static_graph.json currently on disk."""
+    write_atomic(SNAPSHOT_BIN, snapshot_bytes(graph, graph_incidence(graph), OUTPUT_JSON.stat()))
+    print(f"Snapshot written to {SNAPSHOT_BIN}")
+
+def analytics_current(graph):
+    return bundle_version(ANALYTICS_JSON) == GraphIndex.from_json(graph, 0).version
+
+def write_analytics(graph):
+    """Run every bundled clustering on the graph and write static_analytics.json."""
+    bundle = build_bundle(GraphIndex.from_json(graph, 0))
+    write_atomic(ANALYTICS_JSON, json.dumps(bundle, separators=(",", ":")).encode("utf-8"))
+    print(f"Analytics written to {ANALYTICS_JSON} ({len(bundle['results'])} results)")
+
+def run(incremental=False, patch=False, stream=False, fmt="json", jobs=1, snapshot=True, analytics=True):
+    output = OUTPUT_JSON if fmt == "json" else OUTPUT_JSON.with_suffix(".jsonl")
+    track = incremental or patch
+
+    hashes = {name: row_hashes(path, delim) for name, (path, delim) in INPUTS.items()} if track else None
+    if track:
+        hashes["screenshot_assets"] = [file_hash(SCREENSHOT_ASSETS_JSON)] if SCREENSHOT_ASSETS_JSON.exists() else []
+    state = load_state() if track else None
+    previous_hash = file_hash(output) if output.exists() else None
+
+    # Only trust the saved state if the graph on disk is the one it describes
+    if state is not None and state.get("output") != previous_hash:
+        state = None
+
+    if incremental and state is not None:
+        changes = {name: changed_rows(state["inputs"].get(name, []), h) for name, h in hashes.items()}
+        if not any(changes.values()):
+            print(f"Graph up to date: {output}")
+            if not stream and (snapshot or analytics):
+                graph = json.loads(output.read_bytes())
+                if snapshot and not snapshot_current():
+                    write_snapshot(graph)
+                if analytics and not analytics_current(graph):
+                    write_analytics(graph)
+            return
+        print("Changed rows: " + ", ".join(f"{name}={n}" for name, n in changes.items() if n))
+
+    if stream:
+        changed = write_streamed(output, fmt)
+        output_hash = file_hash(output)
+    else:
+        previous_bytes = output.read_bytes() if previous_hash else None
+        # Incremental builds continue the previous build's layout
+        previous = None
+        if state is not None and previous_bytes is not None:
+            previous = {
+                n["data"]["id"]: n["position"]
+                for n in json.loads(previous_bytes)["nodes"] if "position" in n
+            }
+        graph = build_graph(jobs=jobs, previous=previous)
+        payload = serialize(graph)
+        output_hash = hashlib.sha256(payload).hexdigest()
+        changed = payload != previous_bytes
+        if changed:
+            write_atomic(output, payload)
+
+    print(f"Graph written to {output}" if changed else f"Graph unchanged: {output}")
+
+    if snapshot and not stream and (changed or not snapshot_current()):
+        write_snapshot(graph)
+    if analytics and not stream and (changed or not analytics_current(graph)):
+        write_analytics(graph)
+
+    if patch and state is not None and previous_bytes is not None:
+        delta = make_patch(json.loads(previous_bytes), graph, previous_hash, output_hash)
+        write_atomic(PATCH_JSON, json.dumps(delta, indent=2).encode("utf-8"))
+        n_nodes = len(delta["nodes"]["upsert"]) + len(delta["nodes"]["remove"])
+        n_edges = len(delta["edges"]["upsert"]) + len(delta["edges"]["remove"])
+        print(f"Patch written to {PATCH_JSON} ({n_nodes} node / {n_edges} edge changes)")
+
+    if track:
+        write_atomic(STATE_JSON, json.dumps({"inputs": hashes, "output": output_hash}).encode("utf-8"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build static_graph.json from the annotation CSVs.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="skip the build if no input row changed since the last incremental build; "
+                             "any change still rebuilds the whole graph")
+    parser.add_argument("--patch", action="store_true",
+                        help=f"also write the delta to the previous build to {PATCH_JSON.name}")
+    parser.add_argument("--stream", action="store_true",
+                        help="single pass over each CSV with bounded memory; writes compact output without layout positions")
+    parser.add_argument("--format", choices=["json", "jsonl"], default="json",
+                        help="with --stream: compact JSON (default) or JSON Lines (static_graph.jsonl)")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="parse the CSVs in a pool of N processes (0 = one per CPU); same output as serial")
+    parser.add_argument("--no-snapshot", action="store_true",
+                        help=f"do not write the binary snapshot {SNAPSHOT_BIN.name} (never written with --stream)")
+    parser.add_argument("--no-analytics", action="store_true",
+                        help=f"do not precompute the clustering results in {ANALYTICS_JSON.name} (never written with --stream)")
+    args = parser.parse_args()
+
+    if args.patch and args.stream:
+        parser.error("--patch needs the in-memory build and cannot be combined with --stream")
+    if args.format != "json" and not args.stream:
+        parser.error("--format jsonl requires --stream")
+    if args.jobs != 1 and args.stream:
+        parser.error("--jobs cannot be combined with --stream")
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
+    run(incremental=args.incremental, patch=args.patch, stream=args.stream, fmt=args.format, jobs=jobs,
+        snapshot=not args.no_snapshot, analytics=not args.no_analytics)
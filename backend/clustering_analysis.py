@@ -1,11 +1,20 @@
 import json
 import os
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
-from scipy.cluster.hierarchy import fcluster, linkage
-from sklearn.metrics import silhouette_score
+from scipy.cluster.hierarchy import fcluster
 from sklearn.tree import DecisionTreeClassifier, export_text
 
+from .hierarchy import average_linkage, jaccard_distances, select_k
+from .incidence import build_incidence
+from .prominence import cluster_presence
+
+# Run from the repository root as `python -m backend.clustering_analysis`;
+# inputs and outputs live next to this file
+BASE_DIR = Path(__file__).parent.resolve()
+
 # -------------------------------------------------
 # 1. Load Data
 # -------------------------------------------------
@@ -18,7 +27,7 @@ def load_graph(path):
         return json.load(f)
 
 # -------------------------------------------------
-# 2. Build Matrices (Same logic as analyze_rq.py)
+# 2. Build Matrices (shared builder, see incidence.py)
 # -------------------------------------------------
 
 def build_data_matrices(data):
@@ -26,83 +35,31 @@ def build_data_matrices(data):
     Returns:
       bot_features_df: DataFrame (Index=Bots, Columns=Features, Value=1/0)
     """
-    bots = set()
-    features = set()
-    
-    # 1. Nodes
-    for node in data["nodes"]:
-        nid = node["data"]["id"]
-        ntype = node["data"].get("nodeType")
-        if ntype == "bot":
-            bots.add(nid)
-        elif ntype == "feature":
-            features.add(nid)
-            
-    sorted_bots = sorted(list(bots))
-    sorted_features = sorted(list(features))
-    
-    # 2. Mappings
-    feature_to_bots = {f: set() for f in sorted_features}
-    
-    # 3. Edges
-    for edge in data["edges"]:
-        e = edge["data"]
-        src = e["source"]
-        tgt = e["target"]
-        rel = e.get("relation")
-
-        # Bot -> Feature (hasFeature)
-        if rel == "hasFeature":
-            if src in bots and tgt in features:
-                feature_to_bots[tgt].add(src)
-            elif tgt in bots and src in features:
-                feature_to_bots[src].add(tgt)
-
-    # 4. Build DataFrame
-    matrix = np.zeros((len(sorted_bots), len(sorted_features)), dtype=int)
-    
-    for c_idx, feat in enumerate(sorted_features):
-        for r_idx, bot in enumerate(sorted_bots):
-            if bot in feature_to_bots[feat]:
-                matrix[r_idx, c_idx] = 1
-
-    df = pd.DataFrame(matrix, index=sorted_bots, columns=sorted_features)
-    
-    return df
+    return build_incidence(data).to_frame()
 
 # -------------------------------------------------
 # 3. Analyze Clusters
 # -------------------------------------------------
 
-def analyze_clusters(df, n_clusters=None):
+def analyze_clusters(df, n_clusters=None, k_min=2, k_max=8, criterion='silhouette'):
     """
     Performs Agglomerative Clustering and analyzes the contribution of each feature to each cluster.
-    If n_clusters is None, it uses Silhouette Score to automatically find the optimal number of clusters.
+    If n_clusters is None, it sweeps k in [k_min, k_max] and picks the best k by `criterion`
+    ('silhouette', 'calinski_harabasz' or 'davies_bouldin').
     """
     if len(df) == 0:
         print("Empty dataframe.")
         return None
 
     # Perform clustering using the same parameters as analyze_rq.py dendrogram
-    # Jaccard distance for binary data
-    Z_bots = linkage(df, method='average', metric='jaccard')
+    # Jaccard distance for binary data, computed once and reused for the k sweep
+    dist_mat = jaccard_distances(df.values)
+    Z_bots = average_linkage(dist_mat)
     
     if n_clusters is None:
-        best_k = 2
-        best_score = -1
-        max_k = min(8, len(df) - 1)
-        if max_k >= 2:
-            for k in range(2, max_k + 1):
-                labels = fcluster(Z_bots, k, criterion='maxclust')
-                if len(set(labels)) > 1:
-                    score = silhouette_score(df, labels, metric='jaccard')
-                    if score > best_score:
-                        best_score = score
-                        best_k = k
-            n_clusters = best_k
-            print(f"Auto-selected optimal number of clusters: k={n_clusters} (Silhouette Score: {best_score:.3f})")
-        else:
-            n_clusters = 2
+        n_clusters, best_score, _ = select_k(Z_bots, dist_mat, df.values, k_min, k_max, criterion)
+        if best_score is not None:
+            print(f"Auto-selected optimal number of clusters: k={n_clusters} ({criterion} score: {best_score:.3f})")
 
     # Extract flat clusters
     cluster_labels = fcluster(Z_bots, n_clusters, criterion='maxclust')
@@ -117,34 +74,25 @@ def analyze_clusters(df, n_clusters=None):
     for c, size in cluster_sizes.items():
         print(f"  Cluster {c}: {size} bots")
     
-    # Global feature presence (percentage of all bots having the feature)
-    global_presence = df.mean()
-    
-    feature_metrics = []
-    
-    for cluster_id in range(1, n_clusters + 1):
-        cluster_bots = df_clustered[df_clustered['Cluster'] == cluster_id].drop(columns=['Cluster'])
-        
-        # Percentage of bots in THIS cluster having the feature
-        cluster_presence = cluster_bots.mean()
-        
-        for feature in df.columns:
-            g_rate = global_presence[feature]
-            c_rate = cluster_presence[feature]
-            
-            # Difference from global presence. 
-            # Positive means it's overrepresented in this cluster.
-            # Negative means it's underrepresented in this cluster.
-            diff_from_global = c_rate - g_rate
-            
-            feature_metrics.append({
-                'Cluster': cluster_id,
-                'Feature': feature,
-                'Cluster_Presence': round(c_rate, 3),
-                'Global_Presence': round(g_rate, 3),
-                'Diff_From_Global': round(diff_from_global, 3)
-            })
-            
+    # Presence of every feature in every cluster at once
+    cluster_ids, _, presence, global_presence = cluster_presence(
+        df.values, cluster_labels, np.arange(1, n_clusters + 1)
+    )
+
+    # Difference from global presence.
+    # Positive means it's overrepresented in this cluster.
+    # Negative means it's underrepresented in this cluster.
+    diff_from_global = presence - global_presence
+
+    n_features = len(df.columns)
+    feature_metrics = {
+        'Cluster': np.repeat(cluster_ids, n_features),
+        'Feature': np.tile(df.columns.to_numpy(), len(cluster_ids)),
+        'Cluster_Presence': np.round(presence, 3).ravel(),
+        'Global_Presence': np.tile(np.round(global_presence, 3), len(cluster_ids)),
+        'Diff_From_Global': np.round(diff_from_global, 3).ravel(),
+    }
+
     metrics_df = pd.DataFrame(feature_metrics)
     
     return metrics_df, df_clustered
@@ -155,11 +103,7 @@ def analyze_clusters(df, n_clusters=None):
 
 if __name__ == "__main__":
     
-    input_file = "static_graph.json"
-    if not os.path.exists(input_file):
-        # Fallback for running from root
-        input_file = "backend/static_graph.json"
-        
+    input_file = BASE_DIR / "static_graph.json"
     if not os.path.exists(input_file):
         print("Error: static_graph.json not found.")
         exit()
@@ -205,6 +149,6 @@ if __name__ == "__main__":
         tree_rules = export_text(tree_clf, feature_names=list(df.columns))
         print(tree_rules)
             
-        output_file = "cluster_feature_analysis.csv"
+        output_file = BASE_DIR / "cluster_feature_analysis.csv"
         results.to_csv(output_file, index=False)
         print(f"\nSaved full cluster-feature analysis to {output_file}")
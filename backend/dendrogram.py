@@ -0,0 +1,46 @@
+import math
+
+# -------------------------------------------------
+# Dendrogram cuts
+# -------------------------------------------------
+# The average-linkage Jaccard trees of bots and of features (the RQ1 and
+# RQ2 dendrograms of analyze_rq.py) are built once per graph version by
+# GraphIndex.linkage_tree; GET /graph/dendrogram/{kind} serves the tree
+# itself, and a cut at k clusters or at a height only relabels its leaves
+# (see hierarchy.LinkageTree), so a granularity slider can query every
+# step.
+
+KINDS = ("bots", "features")
+
+
+def unknown_kind(kind):
+    if kind not in KINDS:
+        return {"error": f"Unknown dendrogram: {kind}. Use one of: {', '.join(KINDS)}"}
+    return None
+
+
+def dendrogram_cut(graph, kind, k=None, height=None):
+    """
+    Flat clusters of the tree cut into exactly k clusters, or at a height
+    (merges at or below it kept), or an {"error": ...} dict.
+    """
+    error = unknown_kind(kind)
+    if error:
+        return error
+    if (k is None) == (height is None):
+        return {"error": "Give either k or height"}
+
+    tree, _ = graph.linkage_tree(kind)
+    n = len(tree)
+    if height is not None:
+        if not math.isfinite(height) or height < 0:
+            return {"error": "height must be a finite number >= 0"}
+        k = tree.clusters_at(height)
+    elif not 1 <= k <= max(n, 1):
+        return {"error": f"k must be between 1 and {max(n, 1)}"}
+
+    labels = tree.cut(k).tolist() if n else []
+    result = {"kind": kind, "k": min(k, n), "clusters": dict(zip(tree.labels, labels))}
+    if height is not None:
+        result["height"] = height
+    return result
@@ -0,0 +1,293 @@
+import json
+import os
+import threading
+from functools import cached_property
+
+import numpy as np
+
+from .http_cache import CachedPayload
+from .metrics import GRAPH_LOAD_STAGES
+from .snapshot import compact_json, load_snapshot
+from .timing import StageTimer, request_timer
+
+# -----------------------------
+# Paths
+# -----------------------------
+GRAPH_PATH = os.path.join(os.path.dirname(__file__), "static_graph.json")
+SNAPSHOT_PATH = os.path.join(os.path.dirname(__file__), "static_graph.bin")
+
+
+# -----------------------------
+# Indexed graph
+# -----------------------------
+class GraphIndex:
+    """
+    The graph plus the lookups the API routes need, built either from
+    parsed static_graph.json (from_json) or from a memory-mapped
+    static_graph.bin (from_snapshot) without materializing element dicts.
+
+    All lists keep the order of the source file, so results that depend
+    on iteration order (e.g. majority-vote tie breaks) stay stable.
+    """
+
+    def __init__(self, nodes, edges, mtime, data=None, snapshot=None):
+        """nodes: (id, nodeType) pairs; edges: (source, target, relation) triples."""
+        self._data = data
+        self.snapshot = snapshot
+        self.mtime = mtime
+        self._trees = {}
+        self._trees_lock = threading.Lock()
+
+        # --- Nodes ---
+        self.node_ids = []
+        self.node_type = {}
+        self.nodes_by_type = {}
+        for nid, ntype in nodes:
+            self.node_ids.append(nid)
+            self.node_type[nid] = ntype
+            self.nodes_by_type.setdefault(ntype, []).append(nid)
+
+        self.bots = self.nodes_by_type.get("bot", [])
+        self.features = self.nodes_by_type.get("feature", [])
+        self.domains = self.nodes_by_type.get("domain", [])
+
+        # --- Edges ---
+        self.edge_list = []
+        self.edges_by_relation = {}
+        self.edge_positions = {}
+        self.bot_features = {b: set() for b in self.bots}
+        self.feature_bots = {}
+        self.bot_domain = {}
+        self.domain_bots = {d: [] for d in self.domains}
+        self.feature_group = {}
+
+        for src, tgt, rel in edges:
+            self.edges_by_relation.setdefault(rel, []).append((src, tgt))
+            self.edge_positions.setdefault(rel, []).append(len(self.edge_list))
+            self.edge_list.append((src, tgt, rel))
+
+            src_type = self.node_type.get(src)
+            tgt_type = self.node_type.get(tgt)
+
+            if rel == "hasFeature":
+                b, f = None, None
+                if src_type == "bot" and tgt_type == "feature": b, f = src, tgt
+                elif tgt_type == "bot" and src_type == "feature": b, f = tgt, src
+
+                if b and f:
+                    self.bot_features[b].add(f)
+                    self.feature_bots.setdefault(f, []).append(b)
+
+            elif rel == "partOf" and src_type == "bot" and tgt_type == "domain":
+                self.bot_domain[src] = tgt
+                self.domain_bots[tgt].append(src)
+
+            elif rel == "partOf" and src_type == "feature" and tgt_type == "feature_group":
+                self.feature_group[src] = tgt
+
+    @classmethod
+    def from_json(cls, data, mtime):
+        nodes = ((n["data"]["id"], n["data"].get("nodeType")) for n in data["nodes"])
+        edges = (
+            (e["data"]["source"], e["data"]["target"], e["data"].get("relation", "generic"))
+            for e in data["edges"]
+        )
+        return cls(nodes, edges, mtime, data=data)
+
+    @classmethod
+    def from_snapshot(cls, snapshot, mtime):
+        node_ids = snapshot.strings(snapshot.column("node", "id"))
+        node_types = _optional_strings(snapshot, "node", "nodeType", len(node_ids))
+        sources = [node_ids[i] for i in snapshot.column("edge", "source")]
+        targets = [node_ids[i] for i in snapshot.column("edge", "target")]
+        relations = [
+            "generic" if r is None else r
+            for r in _optional_strings(snapshot, "edge", "relation", len(sources))
+        ]
+        return cls(zip(node_ids, node_types), zip(sources, targets, relations), mtime, snapshot=snapshot)
+
+    @cached_property
+    def data(self):
+        """The graph dict; rebuilt from the snapshot only if something asks for it."""
+        if self._data is None:
+            self._data = self.snapshot.graph()
+        return self._data
+
+    @cached_property
+    def node_position(self):
+        """Node id -> position in data["nodes"]."""
+        position = {}
+        for i, nid in enumerate(self.node_ids):
+            position.setdefault(nid, i)
+        return position
+
+    @cached_property
+    def adjacency(self):
+        """Node id -> positions in data["edges"] of the edges touching it, in file order."""
+        adjacency = {nid: [] for nid in self.node_type}
+        for i, (src, tgt, _) in enumerate(self.edge_list):
+            adjacency.setdefault(src, []).append(i)
+            if tgt != src:
+                adjacency.setdefault(tgt, []).append(i)
+        return adjacency
+
+    def edges(self, relation):
+        """(source, target) pairs for one relation, in file order."""
+        return self.edges_by_relation.get(relation, [])
+
+    @cached_property
+    def payload(self):
+        """Compact JSON body for /graph, serialized once per graph version."""
+        if self.snapshot is not None:
+            snap = self.snapshot
+            return CachedPayload(
+                snap.bytes_view("body"), self.mtime / 1e9,
+                digest=snap.digest, gzip=snap.bytes_view("body_gzip"), br=snap.bytes_view("body_br"),
+            )
+        return CachedPayload(compact_json(self.data), self.mtime / 1e9)
+
+    @cached_property
+    def incidence(self):
+        """Sparse bot x feature matrix (bots in file order, features sorted)."""
+        # scipy loads with the first route that needs it, not with the server
+        from scipy import sparse
+        from .incidence import Incidence, graph_incidence
+
+        if self.snapshot is None:
+            return graph_incidence(self.data)
+
+        snap = self.snapshot
+        bots = [self.node_ids[i] for i in snap.array("inc_rows")]
+        features = [self.node_ids[i] for i in snap.array("inc_cols")]
+        indices = snap.array("inc_indices")
+        matrix = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.int8), indices, snap.array("inc_indptr")),
+            shape=(len(bots), len(features)),
+        )
+        return Incidence(matrix, bots, features, dict(self.bot_domain), sorted(self.domains))
+
+    @cached_property
+    def rq_metrics(self):
+        """Per-feature RQ metrics (/metrics/rq), serialized once per graph version."""
+        from .rq_metrics import feature_metrics
+
+        inc = self.incidence
+        body = {
+            "bots": len(inc.bots),
+            "domains": inc.domains,
+            "features": feature_metrics(inc.matrix, inc.bots, inc.features, inc.bot_domain, inc.domains),
+        }
+        return CachedPayload(compact_json(body), self.mtime / 1e9)
+
+    def linkage_tree(self, kind):
+        """
+        (hierarchy.LinkageTree, CachedPayload) of the average-linkage Jaccard
+        tree over "bots" (by their features) or "features" (by their bots),
+        built on first use. Concurrent first requests build it once.
+        """
+        tree = self._trees.get(kind)
+        if tree is not None:
+            return tree
+        with self._trees_lock:
+            if kind not in self._trees:
+                from .hierarchy import LinkageTree, jaccard_linkage
+
+                inc = self.incidence
+                X, labels = (inc.matrix, inc.bots) if kind == "bots" else (inc.matrix.T.tocsr(), inc.features)
+                tree = LinkageTree(jaccard_linkage(X), labels)
+                body = {"kind": kind, "method": "average", "metric": "jaccard", **tree.as_dict()}
+                self._trees[kind] = (tree, CachedPayload(compact_json(body), self.mtime / 1e9))
+            return self._trees[kind]
+
+    @property
+    def version(self):
+        """Content hash of the graph; keys every result derived from it."""
+        return self.payload.digest
+
+    @cached_property
+    def nx_graph(self):
+        """Undirected NetworkX view of the whole graph, built on first use."""
+        import networkx as nx
+
+        G = nx.Graph()
+        G.add_nodes_from(self.node_type)
+        for src, tgt, rel in self.edge_list:
+            G.add_edge(src, tgt, relation=rel)
+        return G
+
+
+# -----------------------------
+# Store
+# -----------------------------
+class GraphStore:
+    """
+    Process-wide holder of the current GraphIndex.
+
+    The graph is loaded once and reloaded only when the mtime of the JSON
+    or of the snapshot changes, so rerunning build_graph.py is picked up
+    without a server restart. A snapshot is used only if it was written
+    from the current JSON; otherwise the JSON is parsed.
+    """
+
+    def __init__(self, path=GRAPH_PATH, snapshot_path=SNAPSHOT_PATH):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self._index = None
+        self._key = None
+        self._lock = threading.Lock()
+
+    def _stat_key(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        try:
+            snapshot_mtime = os.stat(self.snapshot_path).st_mtime_ns
+        except FileNotFoundError:
+            snapshot_mtime = None
+        return mtime, snapshot_mtime
+
+    def get(self):
+        """Current GraphIndex, or None if the graph file does not exist."""
+        try:
+            key = self._stat_key()
+        except FileNotFoundError:
+            return None
+
+        if self._index is not None and self._key == key:
+            return self._index
+
+        with self._lock:
+            if self._index is None or self._key != key:
+                timer = StageTimer()
+                with timer("snapshot"):
+                    snapshot = load_snapshot(self.snapshot_path, self.path)
+                if snapshot is not None:
+                    source = "snapshot"
+                    with timer("index"):
+                        index = GraphIndex.from_snapshot(snapshot, key[0])
+                else:
+                    source = "json"
+                    with timer("parse"):
+                        with open(self.path, "r") as f:
+                            data = json.load(f)
+                    with timer("index"):
+                        index = GraphIndex.from_json(data, key[0])
+                self._index, self._key = index, key
+                _record_load(source, timer)
+            return self._index
+
+
+def _record_load(source, timer):
+    """Report load stages to /metrics and to the current request's Server-Timing."""
+    current = request_timer()
+    for stage, ms in timer.stages.items():
+        GRAPH_LOAD_STAGES.observe(ms / 1000, source=source, stage=stage)
+        if current is not None:
+            current.add(f"graph_load.{stage}", ms)
+
+
+def _optional_strings(snapshot, kind, key, n):
+    """Decoded string column, or all None if no element has the key."""
+    col = snapshot.column(kind, key)
+    return [None] * n if col is None else snapshot.strings(col)
+
+
+graph_store = GraphStore()
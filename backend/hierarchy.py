@@ -0,0 +1,188 @@
+import numpy as np
+from scipy import sparse
+from scipy.cluster.hierarchy import cut_tree, leaves_list, linkage
+from scipy.spatial.distance import squareform
+
+# -------------------------------------------------
+# Hierarchical clustering helpers
+# -------------------------------------------------
+# Shared by the API (clustering.py) and clustering_analysis.py so the
+# distance matrix, the linkage tree and the choice of k are computed the
+# same way everywhere.
+
+
+def jaccard_distances(X):
+    """
+    Pairwise Jaccard distances (1 - |A∩B| / |A∪B|) between the rows of a
+    binary matrix. Intersections come from X·Xᵀ and unions from the row
+    sums, so nothing loops over pairs in Python. Two empty rows are at
+    distance 0, matching scipy's 'jaccard' metric.
+    """
+    X = sparse.csr_matrix(X != 0, dtype=np.float64)
+    intersection = (X @ X.T).toarray()
+    sizes = np.asarray(X.sum(axis=1)).ravel()
+    union = sizes[:, None] + sizes[None, :] - intersection
+
+    dist = np.zeros_like(intersection)
+    np.divide(union - intersection, union, out=dist, where=union > 0)
+    np.fill_diagonal(dist, 0)
+    return dist
+
+
+def average_linkage(dist_mat):
+    """Average-linkage tree from a square distance matrix."""
+    return linkage(squareform(dist_mat, checks=False), method='average')
+
+
+def jaccard_linkage(X):
+    """Average-linkage tree of the rows of a binary matrix under Jaccard distance."""
+    if X.shape[0] < 2:
+        return np.empty((0, 4))
+    return average_linkage(jaccard_distances(X))
+
+
+def maxclust_cuts(Z, ks):
+    """
+    Flat clusterings for every k in ks, cut from the tree in one pass.
+
+    Matches fcluster(Z, k, criterion='maxclust'): when several merges share
+    a height they are applied together, so a cut may have fewer than k
+    clusters. Returns {k: labels}; label numbering is arbitrary.
+    """
+    n = Z.shape[0] + 1
+    heights = Z[:, 2]
+    # Clusters left after applying every merge at or below each merge height
+    remaining = n - np.searchsorted(heights, heights, side='right')
+
+    sizes = {}
+    for k in ks:
+        if k >= n:
+            sizes[k] = n
+        else:
+            sizes[k] = int(remaining[np.argmax(remaining <= k)])
+
+    distinct = sorted(set(sizes.values()), reverse=True)
+    cuts = cut_tree(Z, n_clusters=distinct)
+    column = {c: i for i, c in enumerate(distinct)}
+    return {k: cuts[:, column[c]] for k, c in sizes.items()}
+
+
+class LinkageTree:
+    """
+    A linkage tree (scipy format) over labelled rows, prepared for flat cuts.
+
+    In the dendrogram's leaf order every subtree is a contiguous run of
+    leaves, and each merge joins two adjacent runs. Undoing the last k - 1
+    merges therefore splits the leaf order at k - 1 known positions, so a
+    cut is a cumulative sum over the leaves rather than a walk of the tree.
+    Clusters are numbered left to right in the dendrogram.
+    """
+
+    def __init__(self, Z, labels):
+        self.Z = Z
+        self.labels = list(labels)
+        n = len(self.labels)
+        self.heights = Z[:, 2]
+        self.order = leaves_list(Z) if n > 1 else np.arange(n)
+
+        # Leaf-order start of every node's run; a merge splits at its right run
+        start = np.empty(max(2 * n - 1, 0), dtype=np.int64)
+        start[self.order] = np.arange(n)
+        self.splits = np.empty(len(Z), dtype=np.int64)
+        for i, (a, b) in enumerate(Z[:, :2].astype(np.int64).tolist()):
+            start[n + i] = min(start[a], start[b])
+            self.splits[i] = max(start[a], start[b])
+
+    def __len__(self):
+        return len(self.labels)
+
+    def cut(self, k):
+        """Cluster label per row with exactly k clusters (1 <= k <= n)."""
+        n = len(self.labels)
+        marks = np.zeros(n, dtype=np.int64)
+        marks[self.splits[n - k:]] = 1
+        labels = np.empty(n, dtype=np.int64)
+        labels[self.order] = np.cumsum(marks)
+        return labels
+
+    def clusters_at(self, height):
+        """
+        Number of clusters when every merge at or below `height` is kept
+        (fcluster's 'distance' criterion; average-linkage heights never
+        decrease).
+        """
+        return len(self.labels) - int(np.searchsorted(self.heights, height, side='right'))
+
+    def as_dict(self):
+        """Compact JSON form: the merges as columns, plus the leaf order."""
+        return {
+            "labels": self.labels,
+            "left": self.Z[:, 0].astype(np.int64).tolist(),
+            "right": self.Z[:, 1].astype(np.int64).tolist(),
+            "height": self.heights.tolist(),
+            "size": self.Z[:, 3].astype(np.int64).tolist(),
+            "order": self.order.tolist(),
+        }
+
+
+# -------------------------------------------------
+# Choosing k
+# -------------------------------------------------
+# sklearn is imported by the scores only: the server builds and cuts
+# linkage trees without it
+def _silhouette(D, X, labels):
+    from sklearn.metrics import silhouette_score
+    return silhouette_score(D, labels, metric='precomputed')
+
+
+def _calinski_harabasz(D, X, labels):
+    from sklearn.metrics import calinski_harabasz_score
+    return calinski_harabasz_score(X, labels)
+
+
+def _davies_bouldin(D, X, labels):
+    from sklearn.metrics import davies_bouldin_score
+    return davies_bouldin_score(X, labels)
+
+
+# criterion -> (score function(dist_mat, X, labels), higher_is_better)
+CRITERIA = {
+    'silhouette': (_silhouette, True),
+    'calinski_harabasz': (_calinski_harabasz, True),
+    'davies_bouldin': (_davies_bouldin, False),
+}
+
+
+def select_k(Z, dist_mat, X, k_min=2, k_max=8, criterion='silhouette'):
+    """
+    Sweep k over [k_min, k_max] (capped at n - 1) and return
+    (best_k, best_score, scores), where scores maps k -> score.
+
+    Silhouette reuses the precomputed distance matrix; Calinski–Harabasz
+    and Davies–Bouldin score the rows of X. Ties keep the smaller k.
+    If no k can be scored, best_k is k_min and best_score is None.
+    """
+    if criterion not in CRITERIA:
+        raise ValueError(f"Unknown criterion: {criterion}")
+    score_fn, higher_is_better = CRITERIA[criterion]
+
+    n = Z.shape[0] + 1
+    k_max = min(k_max, n - 1)
+    ks = list(range(k_min, k_max + 1))
+    if not ks:
+        return k_min, None, {}
+
+    if criterion != 'silhouette' and sparse.issparse(X):
+        X = X.toarray()
+
+    best_k, best_score = k_min, None
+    scores = {}
+    for k, labels in maxclust_cuts(Z, ks).items():
+        if not 1 < len(set(labels)) < n:
+            continue
+        score = float(score_fn(dist_mat, X, labels))
+        scores[k] = score
+        if best_score is None or (score > best_score if higher_is_better else score < best_score):
+            best_k, best_score = k, score
+
+    return best_k, best_score, scores
@@ -0,0 +1,102 @@
+import gzip
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from functools import cached_property
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+
+# -----------------------------
+# Pre-serialized payloads
+# -----------------------------
+class CachedPayload:
+    """
+    A response body serialized once, with its compressed variants,
+    a content-hash ETag and a Last-Modified timestamp.
+    """
+
+    def __init__(self, body, mtime, media_type="application/json", digest=None, gzip=None, br=None):
+        self.body = body
+        self.media_type = media_type
+        self.digest = digest or hashlib.sha256(body).hexdigest()
+        self.etag = '"' + self.digest[:32] + '"'
+        self.mtime = int(mtime)
+        self.last_modified = formatdate(self.mtime, usegmt=True)
+
+        # Variants compressed ahead of time (e.g. stored in a snapshot)
+        if gzip is not None:
+            self.__dict__["gzip"] = gzip
+        if br is not None:
+            self.__dict__["br"] = br
+
+    @cached_property
+    def gzip(self):
+        return gzip.compress(self.body, compresslevel=9, mtime=0)
+
+    @cached_property
+    def br(self):
+        if brotli is None:
+            return None
+        return brotli.compress(self.body, quality=11)
+
+    def encoded(self, accept_encoding):
+        """(body, content-encoding) for the best encoding the client accepts."""
+        accepted = {
+            part.split(";")[0].strip().lower()
+            for part in accept_encoding.split(",")
+            if part.strip() and not part.strip().endswith(";q=0")
+        }
+        if "br" in accepted and self.br is not None:
+            return self.br, "br"
+        if "gzip" in accepted:
+            return self.gzip, "gzip"
+        return self.body, None
+
+
+# -----------------------------
+# Conditional responses
+# -----------------------------
+def is_not_modified(request: Request, etag, mtime):
+    """True if the request's validators match (If-None-Match wins over If-Modified-Since)."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip() for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since
+
+    return False
+
+
+# For URLs that carry a content hash: they never change, so never revalidate
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def payload_response(request: Request, payload: CachedPayload, cache_control="no-cache"):
+    """Serve a CachedPayload, answering conditional requests with 304."""
+    headers = {
+        "ETag": payload.etag,
+        "Last-Modified": payload.last_modified,
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+    }
+
+    if is_not_modified(request, payload.etag, payload.mtime):
+        return Response(status_code=304, headers=headers)
+
+    body, encoding = payload.encoded(request.headers.get("accept-encoding", ""))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type=payload.media_type, headers=headers)
@@ -0,0 +1,103 @@
+import numpy as np
+from scipy import sparse
+
+# -------------------------------------------------
+# Bot x Feature incidence matrix
+# -------------------------------------------------
+# Shared by the API (main.py / clustering.py) and the offline analysis
+# scripts (analyze_rq.py, clustering_analysis.py) so they always agree on
+# which bot has which feature.
+
+
+class Incidence:
+    """
+    Sparse bot x feature matrix (1 = bot has feature) with stable index maps.
+
+    Attributes:
+      matrix: scipy.sparse CSR matrix, shape (len(bots), len(features))
+      bots / features: row / column ids, in matrix order
+      bot_index / feature_index: id -> row / column position
+      bot_domain: Dict {bot_id: domain_id}
+      domains: domain ids, sorted
+    """
+
+    def __init__(self, matrix, bots, features, bot_domain, domains):
+        self.matrix = matrix
+        self.bots = bots
+        self.features = features
+        self.bot_index = {b: i for i, b in enumerate(bots)}
+        self.feature_index = {f: j for j, f in enumerate(features)}
+        self.bot_domain = bot_domain
+        self.domains = domains
+
+    @property
+    def shape(self):
+        return self.matrix.shape
+
+    def to_frame(self):
+        """Dense DataFrame (Index=Bots, Columns=Features, Value=1/0)."""
+        import pandas as pd
+        return pd.DataFrame(
+            self.matrix.toarray().astype(int),
+            index=self.bots,
+            columns=self.features,
+        )
+
+
+def build_incidence(data, bots=None, features=None):
+    """
+    Build the Incidence for a graph dict (static_graph.json layout) in one
+    pass over nodes and one pass over edges.
+
+    Rows and columns are sorted by id unless an explicit order is given.
+    """
+    node_type = {}
+    for node in data["nodes"]:
+        node_type[node["data"]["id"]] = node["data"].get("nodeType")
+
+    if bots is None:
+        bots = sorted(n for n, t in node_type.items() if t == "bot")
+    if features is None:
+        features = sorted(n for n, t in node_type.items() if t == "feature")
+    domains = sorted(n for n, t in node_type.items() if t == "domain")
+
+    bot_index = {b: i for i, b in enumerate(bots)}
+    feat_index = {f: j for j, f in enumerate(features)}
+
+    rows, cols = [], []
+    bot_domain = {}
+
+    for edge in data["edges"]:
+        e = edge["data"]
+        src = e["source"]
+        tgt = e["target"]
+        rel = e.get("relation")
+
+        # Bot -> Feature (hasFeature)
+        if rel == "hasFeature":
+            if src in bot_index and tgt in feat_index:
+                rows.append(bot_index[src])
+                cols.append(feat_index[tgt])
+            elif tgt in bot_index and src in feat_index:
+                rows.append(bot_index[tgt])
+                cols.append(feat_index[src])
+
+        # Bot -> Domain (partOf)
+        elif rel == "partOf" and node_type.get(src) == "bot" and node_type.get(tgt) == "domain":
+            bot_domain[src] = tgt
+
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int8), (rows, cols)),
+        shape=(len(bots), len(features)),
+    )
+    # Duplicate edges would otherwise sum to 2
+    matrix.data[:] = 1
+
+    return Incidence(matrix, list(bots), list(features), bot_domain, domains)
+
+
+def graph_incidence(data):
+    """The Incidence the API uses: bots in file order, features sorted by id."""
+    bots = [n["data"]["id"] for n in data["nodes"] if n["data"].get("nodeType") == "bot"]
+    features = sorted(n["data"]["id"] for n in data["nodes"] if n["data"].get("nodeType") == "feature")
+    return build_incidence(data, bots=bots, features=features)
@@ -0,0 +1,171 @@
+import cProfile
+import functools
+import inspect
+import os
+import pstats
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+
+from fastapi.routing import APIRoute
+
+from .metrics import HTTP_LATENCY, HTTP_REQUESTS
+from .timing import StageTimer, _request_timer
+
+# -------------------------------------------------
+# Request instrumentation
+# -------------------------------------------------
+# InstrumentationMiddleware wraps every HTTP request:
+#
+# - latency and request counts per route template go to /metrics;
+# - with GRACE_SERVER_TIMING=1, responses carry a Server-Timing header
+#   with the request's stages (see timing.request_timer) and its total;
+# - with GRACE_PROFILE_DIR set, a request sent with an "X-Profile: 1"
+#   header is run under cProfile and the stats are written to
+#   GRACE_PROFILE_DIR/<time>-<id>.prof (the response's X-Profile header
+#   names the files). Load them with `python -m pstats` or snakeviz.
+#   /cluster profiles its worker process separately (<id>.cluster.prof).
+#
+# Profiling is opt-in on the server side, so clients cannot make an
+# ordinary deployment write to disk.
+
+SERVER_TIMING = os.environ.get("GRACE_SERVER_TIMING", "") not in ("", "0")
+PROFILE_DIR = os.environ.get("GRACE_PROFILE_DIR") or None
+
+_request_profile = ContextVar("request_profile", default=None)
+# One profiled request at a time: cProfile on the event loop thread would
+# otherwise record (and switch off) another request's profiler
+_profiling = threading.Lock()
+
+
+class RequestProfile:
+    """cProfile data for one request, collected from every thread it runs code in."""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        stem = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.path = os.path.join(directory, f"{stem}.prof")
+        self.worker_path = os.path.join(directory, f"{stem}.cluster.prof")
+        self.files = [self.path]
+        self._profiles = []
+        self._lock = threading.Lock()
+
+    def profiler(self):
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        return profile
+
+    def write(self):
+        with self._lock:
+            profiles = list(self._profiles)
+        stats = None
+        for profile in profiles:
+            try:
+                part = pstats.Stats(profile)
+            except TypeError:  # recorded nothing
+                continue
+            if stats is None:
+                stats = part
+            else:
+                stats.add(part)
+        if stats is not None:
+            stats.dump_stats(self.path)
+
+
+def request_profile():
+    """RequestProfile of the request being served, or None if it is not profiled."""
+    return _request_profile.get()
+
+
+def _route_label(scope):
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class InstrumentationMiddleware:
+    """Pure ASGI middleware, so streaming responses pass through untouched."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        timer = StageTimer()
+        timer_token = _request_timer.set(timer)
+
+        profile = None
+        if PROFILE_DIR is not None and dict(scope["headers"]).get(b"x-profile", b"0") not in (b"", b"0"):
+            if _profiling.acquire(blocking=False):
+                profile = RequestProfile(PROFILE_DIR)
+        profile_token = _request_profile.set(profile)
+        loop_profiler = profile.profiler() if profile is not None else None
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                if SERVER_TIMING:
+                    timer.add("total", (time.perf_counter() - start) * 1000)
+                    headers.append((b"server-timing", timer.server_timing().encode("latin-1")))
+                if profile is not None:
+                    files = ", ".join(os.path.basename(f) for f in profile.files)
+                    headers.append((b"x-profile", files.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            if loop_profiler is not None:
+                loop_profiler.enable()
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if loop_profiler is not None:
+                loop_profiler.disable()
+                profile.write()
+                _profiling.release()
+            elapsed = time.perf_counter() - start
+            route = _route_label(scope)
+            HTTP_LATENCY.observe(elapsed, method=scope["method"], route=route)
+            HTTP_REQUESTS.inc(method=scope["method"], route=route, status=status)
+            _request_profile.reset(profile_token)
+            _request_timer.reset(timer_token)
+
+
+def _profiled(func):
+    """Run a sync endpoint (in its pool thread) under the request's profiler, if any."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = request_profile()
+        if profile is None:
+            return func(*args, **kwargs)
+        profiler = profile.profiler()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+ profiles every thread from the event loop's profiler
+            return func(*args, **kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+    return wrapper
+
+
+class InstrumentedRoute(APIRoute):
+    """
+    Route class for the app: sync endpoints run in a thread pool, which
+    cProfile in the middleware cannot see, so they profile themselves.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        if not inspect.iscoroutinefunction(endpoint):
+            endpoint = _profiled(endpoint)
+        super().__init__(path, endpoint, **kwargs)
@@ -0,0 +1,254 @@
+import cProfile
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .clustering import ALGORITHMS, preload, run_clustering
+from .graph_store import graph_store
+from .metrics import CLUSTER_COMPUTE, CLUSTER_REQUESTS, CLUSTER_STAGES
+
+
+# -----------------------------
+# Worker side
+# -----------------------------
+# Each worker process keeps its own GraphStore, so the graph is loaded
+# (memory-mapped when a snapshot exists) once per worker, not per job.
+def _run_clustering_job(algorithm, params, profile_path=None):
+    if profile_path is None:
+        return _cluster(algorithm, params)
+
+    # Profiled request (see instrumentation.py): the work happens here
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return _cluster(algorithm, params)
+    finally:
+        profiler.disable()
+        profiler.dump_stats(profile_path)
+
+
+def _cluster(algorithm, params):
+    graph = graph_store.get()
+    if graph is None:
+        return None, {"error": "static_graph.json not found"}
+    return graph.version, run_clustering(graph, algorithm, params)
+
+
+def _warm_worker():
+    # Libraries, graph and the views every algorithm shares
+    preload()
+    graph = graph_store.get()
+    if graph is not None:
+        graph.incidence
+
+
+def algorithm_label(algorithm):
+    """Metric label for an algorithm name; unknown names share one label."""
+    return algorithm if algorithm in ALGORITHMS else "unknown"
+
+
+# -----------------------------
+# Jobs
+# -----------------------------
+class ClusterJob:
+    """One /cluster computation; `done` resolves once status is final."""
+
+    def __init__(self, job_id, version, key, algorithm, params):
+        self.id = job_id
+        self.version = version
+        self.key = key
+        self.algorithm = algorithm
+        self.params = params
+        self.status = "pending"
+        self.result = None
+        self.error = None
+        self.coalesced = 0
+        self.submitted = time.time()
+        self.finished = None
+        self.future = None
+        self.done = Future()
+
+    def finish(self, status, result=None, error=None):
+        self.status = status
+        self.result = result
+        self.error = error
+        self.finished = time.time()
+        self.done.set_result(self)
+
+    def response(self):
+        """What the synchronous POST /cluster returns for this job."""
+        if self.status == "done":
+            return self.result
+        return {"error": self.error}
+
+    def describe(self):
+        status = self.status
+        if status == "pending" and self.future is not None and self.future.running():
+            status = "running"
+
+        info = {
+            "job_id": self.id,
+            "status": status,
+            "algorithm": self.algorithm,
+            "params": self.params,
+            "coalesced": self.coalesced,
+            "submitted": self.submitted,
+            "finished": self.finished,
+        }
+        if self.status == "done":
+            info["result"] = self.result
+        elif self.status == "failed":
+            info["error"] = self.error
+        return info
+
+
+class ClusterJobs:
+    """
+    Runs /cluster computations in a process pool, off the event loop and
+    outside the server's GIL.
+
+    Results go into the shared ResultCache; a request that is bundled
+    (see analytics.py) or already cached finishes immediately, and
+    identical requests (same graph version, algorithm and params)
+    submitted while one is in flight are attached to that job instead of
+    computing again. Finished jobs are
+    kept (up to `keep`) so their results can be fetched by id.
+    """
+
+    def __init__(self, cache, bundle=None, max_workers=None, keep=256):
+        self.cache = cache
+        self.bundle = bundle
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.keep = keep
+        self._executor = None
+        self._jobs = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        # spawn, not fork: the server process has threads running
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def start(self):
+        """
+        Create the pool and warm its workers (imports, graph) ahead of the
+        first job. Returns the warm-up futures.
+        """
+        with self._lock:
+            pool = self._pool()
+            # One per worker; the pool starts a process for each queued task
+            return [pool.submit(_warm_worker) for _ in range(self.max_workers)]
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _register(self, job):
+        self._jobs[job.id] = job
+        excess = len(self._jobs) - self.keep
+        if excess > 0:
+            # Oldest finished jobs first, wherever they are in the queue, so a
+            # slow or stuck job does not keep the finished ones behind it
+            finished = [j.id for j in self._jobs.values() if j.finished is not None]
+            for job_id in finished[:excess]:
+                del self._jobs[job_id]
+
+    def submit(self, version, algorithm, params, profile_path=None):
+        """
+        (ClusterJob, source) for this request, where source says whether
+        the job was answered from the analytics "bundle" or the "cache",
+        "coalesced" with one in flight or newly "computed". With
+        profile_path the job always runs, under cProfile, and its stats
+        are written to that file.
+        """
+        key = (algorithm, tuple(sorted(params.items())))
+        label = algorithm_label(algorithm)
+
+        with self._lock:
+            running = self._inflight.get((version, key))
+            if running is not None and profile_path is None:
+                running.coalesced += 1
+                CLUSTER_REQUESTS.inc(algorithm=label, source="coalesced")
+                return running, "coalesced"
+
+            job = ClusterJob(uuid.uuid4().hex, version, key, algorithm, params)
+            self._register(job)
+
+            bundled = None
+            if self.bundle is not None and profile_path is None:
+                bundled = self.bundle.get(version, algorithm, params)
+            if bundled is not None:
+                job.finish("done", result=bundled)
+                CLUSTER_REQUESTS.inc(algorithm=label, source="bundle")
+                return job, "bundle"
+
+            cached = self.cache.get(version, key) if profile_path is None else None
+            if cached is not None:
+                job.finish("done", result=cached)
+                CLUSTER_REQUESTS.inc(algorithm=label, source="cache")
+                return job, "cache"
+
+            args = (_run_clustering_job, algorithm, params, profile_path)
+            try:
+                job.future = self._pool().submit(*args)
+            except BrokenProcessPool:
+                self._executor = None
+                job.future = self._pool().submit(*args)
+            if profile_path is None:
+                self._inflight[(version, key)] = job
+
+        CLUSTER_REQUESTS.inc(algorithm=label, source="computed")
+        # Outside the lock: the callback runs at once if the job already finished
+        job.future.add_done_callback(lambda future: self._finish(job, future))
+        return job, "computed"
+
+    def _finish(self, job, future):
+        try:
+            version, result = future.result()
+        except BaseException as exc:
+            if isinstance(exc, BrokenProcessPool):
+                with self._lock:
+                    self._executor = None
+            status, result, error = "failed", None, f"{type(exc).__name__}: {exc}"
+        else:
+            # Results carrying an "error" are returned but never cached
+            if not (isinstance(result, dict) and "error" in result):
+                self.cache.put(version, job.key, result)
+                self._observe(job.algorithm, result.get("timings", {}))
+            status, error = "done", None
+
+        with self._lock:
+            self._inflight.pop((job.version, job.key), None)
+        job.finish(status, result=result, error=error)
+
+    @staticmethod
+    def _observe(algorithm, timings):
+        """Record a computed result's worker-side stage timings in /metrics."""
+        label = algorithm_label(algorithm)
+        for stage, ms in timings.items():
+            CLUSTER_STAGES.observe(ms / 1000, algorithm=label, stage=stage)
+        CLUSTER_COMPUTE.observe((timings.get("algorithm", 0) + timings.get("positions", 0)) / 1000, algorithm=label)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "in_flight": len(self._inflight),
+                "jobs": len(self._jobs),
+            }
@@ -0,0 +1,190 @@
+import math
+import random
+
+import networkx as nx
+import numpy as np
+
+# -------------------------------------------------
+# Precomputed node positions
+# -------------------------------------------------
+# build_graph.py stores a default layout in static_graph.json (as each
+# node's Cytoscape "position") and /cluster adds one per clustering, so
+# the frontend can render with a "preset" layout instead of running a
+# force-directed layout in the browser. Layouts are seeded, so the same
+# graph always gets the same picture.
+#
+# A force-directed layout of the whole graph costs seconds to minutes
+# once graphs grow, so only the default layout of small graphs gets one.
+# Clusterings (and large graphs, by domain and feature group) are laid
+# out in two levels instead: the groups as a small force-directed graph,
+# then each group's members packed on a disk around its position.
+
+SEED = 42
+ITERATIONS = 200
+# Pixels per sqrt(node count); roughly the spread the old cose layout had
+SPACING = 80
+# Largest graph whose default layout is a full force-directed one
+FULL_LAYOUT_LIMIT = 500
+# Distance between neighboring members of a group
+MEMBER_SPACING = SPACING
+# Groups are pushed apart (at most this much) until their disks do not overlap
+MAX_SPREAD = 3.0
+GOLDEN_ANGLE = math.pi * (3 - math.sqrt(5))
+
+
+def _point(x, y):
+    return {"x": round(float(x), 1), "y": round(float(y), 1)}
+
+
+def spring_positions(G, seed=SEED):
+    """{node: {"x", "y"}} from a seeded Fruchterman-Reingold layout of G."""
+    if G.number_of_nodes() == 0:
+        return {}
+    scale = SPACING * math.sqrt(G.number_of_nodes())
+    pos = nx.spring_layout(G, iterations=ITERATIONS, scale=scale, seed=seed)
+    return {n: _point(*pos[n]) for n in G.nodes}
+
+
+def _disk_radius(n):
+    return MEMBER_SPACING * math.sqrt(n / math.pi) + MEMBER_SPACING / 2
+
+
+def grouped_positions(node_ids, edges, groups, seed=SEED):
+    """
+    Two-level layout of the graph with the given (node -> group) groups.
+
+    The groups are laid out as one node each, tied by the number of graph
+    edges between them; each group's members then fill a disk around
+    that point (sunflower pattern, best-connected members in the middle).
+    A node without a group joins the group most of its neighbors are in.
+    Linear in the graph, plus a force-directed layout of the groups.
+    `edges` are (source, target) pairs and are read twice.
+    """
+    degree = dict.fromkeys(node_ids, 0)
+    votes = {}
+    for src, tgt in edges:
+        if src not in degree or tgt not in degree:
+            continue
+        degree[src] += 1
+        degree[tgt] += 1
+        for a, b in ((src, tgt), (tgt, src)):
+            if a not in groups and b in groups:
+                counts = votes.setdefault(a, {})
+                counts[groups[b]] = counts.get(groups[b], 0) + 1
+
+    members = {}
+    group_of = {}
+    for n in node_ids:
+        group = groups.get(n)
+        if group is None:
+            counts = votes.get(n)
+            group = max(counts, key=counts.get) if counts else ("ungrouped",)
+        members.setdefault(group, []).append(n)
+        group_of[n] = group
+    if not members:
+        return {}
+
+    index = {g: i for i, g in enumerate(members)}
+    weights = {}
+    for src, tgt in edges:
+        if src in degree and tgt in degree:
+            i, j = index[group_of[src]], index[group_of[tgt]]
+            if i != j:
+                key = (min(i, j), max(i, j))
+                weights[key] = weights.get(key, 0) + 1
+
+    # --- Groups ---
+    S = nx.Graph()
+    S.add_nodes_from(range(len(members)))
+    top = max(weights.values(), default=1)
+    S.add_weighted_edges_from((i, j, w / top) for (i, j), w in weights.items())
+    if len(members) == 1:
+        centers = np.zeros((1, 2))
+    else:
+        pos = nx.spring_layout(S, iterations=ITERATIONS, scale=SPACING * math.sqrt(len(degree)), seed=seed)
+        centers = np.array([pos[i] for i in range(len(members))])
+
+        # Spread the groups apart where their disks would overlap
+        radii = np.array([_disk_radius(len(m)) for m in members.values()])
+        dist = np.sqrt(((centers[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2))
+        np.fill_diagonal(dist, np.inf)
+        need = (radii[:, None] + radii[None, :]) / np.maximum(dist, 1e-9)
+        centers *= min(MAX_SPREAD, max(1.0, float(need.max())))
+
+    # --- Members ---
+    step = MEMBER_SPACING / math.sqrt(math.pi)
+    positions = {}
+    for (cx, cy), group_members in zip(centers, members.values()):
+        ordered = sorted(group_members, key=lambda n: -degree[n])
+        for i, n in enumerate(ordered):
+            r = step * math.sqrt(i + 0.5)
+            positions[n] = _point(cx + r * math.cos(i * GOLDEN_ANGLE), cy + r * math.sin(i * GOLDEN_ANGLE))
+    return positions
+
+
+def graph_positions(graph):
+    """
+    Default layout for a graph dict (static_graph.json layout). Graphs
+    above FULL_LAYOUT_LIMIT nodes are grouped by what the nodes are
+    partOf (bots by domain, features by feature group).
+    """
+    node_ids = [n["data"]["id"] for n in graph["nodes"]]
+    edges = [(e["data"]["source"], e["data"]["target"]) for e in graph["edges"]]
+    if len(node_ids) <= FULL_LAYOUT_LIMIT:
+        G = nx.Graph()
+        G.add_nodes_from(node_ids)
+        G.add_edges_from(edges)
+        return spring_positions(G)
+
+    groups = {}
+    for e in graph["edges"]:
+        if e["data"].get("relation") == "partOf":
+            groups[e["data"]["source"]] = e["data"]["target"]
+            groups.setdefault(e["data"]["target"], e["data"]["target"])
+    return grouped_positions(node_ids, edges, groups)
+
+
+def seeded_positions(graph, previous, seed=SEED):
+    """
+    Default layout that keeps the `previous` position of every node that
+    still exists, so a rebuild only moves what is new. A new node goes
+    next to the mean position of its placed neighbors, or on a ring
+    around the layout if it has none.
+    """
+    node_ids = [n["data"]["id"] for n in graph["nodes"]]
+    positions = {n: previous[n] for n in node_ids if n in previous}
+    if not positions:
+        return graph_positions(graph)
+
+    neighbors = {}
+    for e in graph["edges"]:
+        src, tgt = e["data"]["source"], e["data"]["target"]
+        neighbors.setdefault(src, []).append(tgt)
+        neighbors.setdefault(tgt, []).append(src)
+
+    xs = [p["x"] for p in positions.values()]
+    ys = [p["y"] for p in positions.values()]
+    cx, cy = (min(xs) + max(xs)) / 2, (min(ys) + max(ys)) / 2
+    ring = max(max(xs) - min(xs), max(ys) - min(ys)) / 2 + SPACING
+
+    rng = random.Random(seed)
+    isolated = 0
+    for n in node_ids:
+        if n in positions:
+            continue
+        placed = [positions[m] for m in neighbors.get(n, []) if m in positions]
+        if placed:
+            angle = rng.uniform(0, 2 * math.pi)
+            x = sum(p["x"] for p in placed) / len(placed) + MEMBER_SPACING * math.cos(angle)
+            y = sum(p["y"] for p in placed) / len(placed) + MEMBER_SPACING * math.sin(angle)
+        else:
+            x = cx + ring * math.cos(isolated * GOLDEN_ANGLE)
+            y = cy + ring * math.sin(isolated * GOLDEN_ANGLE)
+            isolated += 1
+        positions[n] = _point(x, y)
+    return positions
+
+
+def cluster_positions(node_ids, edges, clusters, seed=SEED):
+    """Layout with the members of each cluster drawn together around its own spot."""
+    return grouped_positions(node_ids, edges, clusters, seed=seed)
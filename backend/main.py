@@ -1,19 +1,41 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 
-from sklearn.cluster import AgglomerativeClustering, SpectralClustering
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.metrics import silhouette_score
-import pandas as pd
-
-import numpy as np
-import networkx as nx
+import asyncio
 import json
 import os
+import time
+from typing import List, Optional
+
+from .analytics import AnalyticsBundle
+from .clustering import algorithm_params
+from .dendrogram import dendrogram_cut, unknown_kind
+from .graph_store import graph_store
+from .http_cache import payload_response
+from .instrumentation import InstrumentationMiddleware, InstrumentedRoute, request_profile
+from .jobs import ClusterJobs, algorithm_label
+from .metrics import CLUSTER_LATENCY, CONTENT_TYPE, REGISTRY, Gauge
+from .result_cache import ResultCache
+from .similarity import SimilarityStore
+from .static_assets import StaticIndex
+from .subgraph import edge_page, filtered_subgraph, neighborhood, node_page
+from .timing import request_timer
+from .warmup import WarmUp
 
 app = FastAPI()
+# Lets sync routes join a profiled request (see instrumentation.py)
+app.router.route_class = InstrumentedRoute
+
+# Clustering is deterministic per graph version: common requests are
+# answered from the build-time bundle, other results are memoized...
+analytics_bundle = AnalyticsBundle()
+cluster_cache = ResultCache(maxsize=64)
+# ...and computed in a process pool, coalescing identical in-flight requests
+cluster_jobs = ClusterJobs(cluster_cache, bundle=analytics_bundle)
+# Feature co-occurrence / bot similarity lists, updated per graph version
+similarity_store = SimilarityStore()
 
 # Add CORS middleware
 app.add_middleware(
@@ -23,359 +45,304 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost: latency per route, Server-Timing, opt-in cProfile
+app.add_middleware(InstrumentationMiddleware)
+
+# Clusterings computed during warm-up, with default parameters: what the
+# frontend's algorithm menu requests (comma-separated; empty for none)
+WARM_ALGORITHMS = [a for a in os.environ.get("GRACE_WARM_ALGORITHMS", "domain,agglomerative").split(",") if a]
+worker_warmups = []
+
+
+def warm_graph():
+    graph = graph_store.get()
+    if graph is None:
+        raise FileNotFoundError("static_graph.json not found")
+    graph.payload
+    return graph
+
+
+def warm_similarity():
+    similarity_store.get(warm_graph())
+
+
+def warm_workers():
+    for future in worker_warmups:
+        future.result()
+
+
+def warm_clusters():
+    graph = warm_graph()
+    for algorithm in WARM_ALGORITHMS:
+        job, _ = cluster_jobs.submit(graph.version, algorithm, algorithm_params(algorithm, {}))
+        job.done.result()
+        error = job.error if job.status != "done" else job.result.get("error")
+        if error:
+            raise RuntimeError(f"{algorithm}: {error}")
+
+
+warmup = WarmUp([
+    ("graph", warm_graph),
+    ("similarity", warm_similarity),
+    ("analytics", analytics_bundle.load),
+    ("workers", warm_workers),
+    ("clusters", warm_clusters),
+    ("frontend", lambda: frontend_index.precompress()),
+])
+
+REGISTRY.register(Gauge(
+    "grace_ready", "1 once the startup warm-up has finished (see GET /ready).",
+    function=lambda: {(): int(warmup.ready)},
+))
+REGISTRY.register(Gauge(
+    "grace_cluster_cache", "Cluster result cache counters (hits, misses, size).", ("stat",),
+    function=lambda: {(k,): v for k, v in cluster_cache.stats().items() if k in ("hits", "misses", "size")},
+))
+REGISTRY.register(Gauge(
+    "grace_cluster_jobs_in_flight", "Clustering jobs running or queued in the process pool.",
+    function=lambda: {(): cluster_jobs.stats()["in_flight"]},
+))
+
+
+@app.on_event("startup")
+def start_warmup():
+    # Only cheap work here so the server accepts requests at once; the
+    # graph, caches and workers warm up in the background (see warmup.py)
+    frontend_index.load()
+    # The worker processes spawn (and import the analytics libraries)
+    # while this process loads the graph
+    worker_warmups.extend(cluster_jobs.start())
+    warmup.start()
+
+
+@app.on_event("shutdown")
+def stop_cluster_jobs():
+    cluster_jobs.shutdown()
+
 
 # -----------------------------
 # API Routes
 # -----------------------------
 @app.get("/graph")
-def get_graph():
-    data_path = os.path.join(os.path.dirname(__file__), "static_graph.json")
-    if not os.path.exists(data_path):
+def get_graph(request: Request):
+    graph = graph_store.get()
+    if graph is None:
         return {"error": "static_graph.json not found. Please run the conversion script."}
 
-    with open(data_path, "r") as f:
-        data = json.load(f)
-    return data
+    # Pre-serialized (and pre-compressed) bytes; clients revalidate via ETag
+    return payload_response(request, graph.payload)
 
 
-@app.post("/cluster")
-def cluster_graph(algorithm: str = "spectral"):
+def query_response(result):
+    """Graph query results; an {"error": ...} result becomes a 400."""
+    if "error" in result:
+        return JSONResponse(result, status_code=400)
+    return result
 
-    # -----------------------------
-    # Load graph JSON
-    # -----------------------------
-    data_path = os.path.join(os.path.dirname(__file__), "static_graph.json")
-    if not os.path.exists(data_path):
+
+@app.get("/graph/subgraph")
+def get_subgraph(
+    bots: List[str] = Query([]),
+    domains: List[str] = Query([]),
+    groups: List[str] = Query([]),
+):
+    graph = graph_store.get()
+    if graph is None:
         return {"error": "static_graph.json not found"}
+    return query_response(filtered_subgraph(graph, bots, domains, groups))
 
-    with open(data_path, "r") as f:
-        data = json.load(f)
 
-    # -----------------------------
-    # Build node type lookup
-    # -----------------------------
-    node_type = {}
-    for node in data["nodes"]:
-        nid = node["data"]["id"]
-        node_type[nid] = node["data"].get("nodeType")
+@app.get("/graph/neighborhood/{node_id}")
+def get_neighborhood(node_id: str, hops: int = 1):
+    graph = graph_store.get()
+    if graph is None:
+        return {"error": "static_graph.json not found"}
+    return query_response(neighborhood(graph, node_id, hops))
 
-    bots = [n for n in node_type if node_type[n] == "bot"]
-    features = [n for n in node_type if node_type[n] == "feature"]
-    domains = [n for n in node_type if node_type[n] == "domain"]
 
-    # -----------------------------
-    # Build graph with relations
-    # -----------------------------
-    G = nx.Graph()
-    for node_id in node_type:
-        G.add_node(node_id)
-
-    for edge in data["edges"]:
-        src = edge["data"]["source"]
-        tgt = edge["data"]["target"]
-        rel = edge["data"].get("relation", "generic")
-        G.add_edge(src, tgt, relation=rel)
-
-    clusters = {}
-
-    # ============================================================
-    # 1. Greedy Modularity (kept as-is, but not ideal here)
-    # ============================================================
-    if algorithm == "greedy_modularity":
-        try:
-            communities = nx.community.greedy_modularity_communities(G)
-            for i, comm in enumerate(communities):
-                for node_id in comm:
-                    clusters[node_id] = i
-        except Exception as e:
-            return {"error": str(e)}
-
-    # ============================================================
-    # 2. Spectral Clustering (FIXED: bots clustered by features)
-    # ============================================================
-    elif algorithm == "spectral":
-        try:
-            # --- Build bot-feature incidence matrix ---
-            bot_index = {b: i for i, b in enumerate(bots)}
-            feat_index = {f: j for j, f in enumerate(features)}
+@app.get("/graph/nodes")
+def get_nodes(type: Optional[str] = None, offset: int = 0, limit: int = 100):
+    graph = graph_store.get()
+    if graph is None:
+        return {"error": "static_graph.json not found"}
+    return query_response(node_page(graph, type, offset, limit))
+
 
-            X = np.zeros((len(bots), len(features)))
+@app.get("/graph/edges")
+def get_edges(relation: Optional[str] = None, offset: int = 0, limit: int = 100):
+    graph = graph_store.get()
+    if graph is None:
+        return {"error": "static_graph.json not found"}
+    return query_response(edge_page(graph, relation, offset, limit))
 
-            for u, v, attrs in G.edges(data=True):
-                if attrs.get("relation") == "hasFeature":
-                    if u in bot_index and v in feat_index:
-                        X[bot_index[u], feat_index[v]] = 1
-                    elif v in bot_index and u in feat_index:
-                        X[bot_index[v], feat_index[u]] = 1
 
-            # --- Similarity between bots ---
-            similarity = cosine_similarity(X)
+@app.get("/graph/features/{feature_id}/cooccurrence")
+def get_feature_cooccurrence(feature_id: str, k: int = 10):
+    graph = graph_store.get()
+    if graph is None:
+        return {"error": "static_graph.json not found"}
+    return query_response(similarity_store.get(graph).cooccurring_features(feature_id, k))
 
-            # Use domain count as meaningful default
-            n_clusters = min(4, len(bots))
 
-            sc = SpectralClustering(
-                n_clusters=n_clusters,
-                affinity="precomputed",
-                assign_labels="discretize",
-                random_state=42
-            )
+@app.get("/graph/bots/{bot_id}/similar")
+def get_similar_bots(bot_id: str, k: int = 10):
+    graph = graph_store.get()
+    if graph is None:
+        return {"error": "static_graph.json not found"}
+    return query_response(similarity_store.get(graph).similar_bots(bot_id, k))
 
-            labels = sc.fit_predict(similarity)
 
-            # Assign bot clusters
-            for i, bot in enumerate(bots):
-                clusters[bot] = int(labels[i])
+@app.get("/graph/dendrogram/{kind}")
+def get_dendrogram(request: Request, kind: str):
+    graph = graph_store.get()
+    if graph is None:
+        return {"error": "static_graph.json not found"}
+    error = unknown_kind(kind)
+    if error:
+        return query_response(error)
 
-            # Propagate cluster labels back to connected domains/features
-            for edge in data["edges"]:
-                src = edge["data"]["source"]
-                tgt = edge["data"]["target"]
-                rel = edge["data"].get("relation")
+    # Linkage tree of bots or features, built and serialized once per graph version
+    return payload_response(request, graph.linkage_tree(kind)[1])
 
-                if rel == "partOf" and src in clusters:
-                    clusters[tgt] = clusters[src]
 
-                if rel == "hasFeature" and src in clusters:
-                    clusters[tgt] = clusters[src]
+@app.get("/graph/dendrogram/{kind}/cut")
+def cut_dendrogram(kind: str, k: Optional[int] = None, height: Optional[float] = None):
+    graph = graph_store.get()
+    if graph is None:
+        return {"error": "static_graph.json not found"}
+    return query_response(dendrogram_cut(graph, kind, k, height))
 
-        except Exception as e:
-            return {"error": f"Spectral error: {str(e)}"}
 
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus text exposition of the counters and histograms in metrics.py."""
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
 
-    # ============================================================
-    # 4. Domain Baseline (kept exactly as you wrote)
-    # ============================================================
-    elif algorithm == "domain":
-        try:
-            domain_clusters = {}
-            next_cluster_id = 0
-
-            # Assign domains
-            for d in domains:
-                domain_clusters[d] = next_cluster_id
-                clusters[d] = next_cluster_id
-                next_cluster_id += 1
-
-            bot_to_domain = {}
-            feature_connections = {}
-
-            for edge in data["edges"]:
-                src = edge["data"]["source"]
-                tgt = edge["data"]["target"]
-                rel = edge["data"]["relation"]
-
-                if rel == "partOf" and tgt in domain_clusters:
-                    clusters[src] = domain_clusters[tgt]
-                    bot_to_domain[src] = domain_clusters[tgt]
-
-                if rel == "hasFeature":
-                    feature_connections.setdefault(tgt, []).append(src)
-
-            for fid, bot_list in feature_connections.items():
-                counts = {}
-                for bid in bot_list:
-                    if bid in bot_to_domain:
-                        cid = bot_to_domain[bid]
-                        counts[cid] = counts.get(cid, 0) + 1
-
-                if counts:
-                    best = max(counts, key=counts.get)
-                    clusters[fid] = best
-
-        except Exception as e:
-            return {"error": f"Domain clustering error: {str(e)}"}
-
-    # ============================================================
-    # 5. Agglomerative (Hidden Similarities / Bot Types)
-    # ============================================================
-    elif algorithm == "agglomerative":
-        from sklearn.cluster import AgglomerativeClustering
-        from itertools import combinations
-        
-        # 1. Build Bot Projection (Jaccard)
-        bot_features = {b: set() for b in bots}
-        feature_to_bots = {}
-        
-        for edge in data["edges"]:
-            d = edge["data"]
-            src = d["source"]
-            tgt = d["target"]
-            rel = d.get("relation")
-            
-            if rel == "hasFeature":
-                b, f = None, None
-                if src in bots and tgt in features: b, f = src, tgt
-                elif tgt in bots and src in features: b, f = tgt, src
-                
-                if b and f:
-                    bot_features[b].add(f)
-                    feature_to_bots.setdefault(f, []).append(b)
-
-        # Build Distance Matrix (1 - Jaccard) for clustering
-        n_bots = len(bots)
-        dist_mat = np.ones((n_bots, n_bots)) # Default max distance
-        np.fill_diagonal(dist_mat, 0)
-        
-        bot_list = list(bots)
-        bot_idx = {b: i for i, b in enumerate(bot_list)}
-        
-        for b1, b2 in combinations(bot_list, 2):
-            f1 = bot_features[b1]
-            f2 = bot_features[b2]
-            
-            intersection = len(f1 & f2)
-            union = len(f1 | f2)
-            
-            if union > 0:
-                jaccard = intersection / union
-                dist = 1.0 - jaccard
-                i, j = bot_idx[b1], bot_idx[b2]
-                dist_mat[i, j] = dist_mat[j, i] = dist
-
-        # Build DF for Silhouette Score and Analysis
-        matrix = np.zeros((len(bot_list), len(features)), dtype=int)
-        sorted_features = sorted(list(features))
-        feat_idx = {f: j for j, f in enumerate(sorted_features)}
-        
-        for i, b in enumerate(bot_list):
-            for f in bot_features[b]:
-                matrix[i, feat_idx[f]] = 1
-                
-        df = pd.DataFrame(matrix, index=bot_list, columns=sorted_features)
-
-        # 2. Cluster - Auto-select K using Silhouette Score
+
+@app.get("/ready")
+def readiness():
+    """200 once the startup warm-up is done; 503 while it runs or if a step failed."""
+    return JSONResponse(warmup.describe(), status_code=200 if warmup.ready else 503)
+
+
+@app.get("/metrics/rq")
+def get_rq_metrics(request: Request):
+    graph = graph_store.get()
+    if graph is None:
+        return {"error": "static_graph.json not found"}
+
+    # Entropy / ubiquity / domain concentration per feature, cached per graph version
+    return payload_response(request, graph.rq_metrics)
+
+
+@app.post("/cluster")
+async def cluster_graph(
+    algorithm: str = "spectral",
+    k_min: Optional[int] = None,
+    k_max: Optional[int] = None,
+    criterion: Optional[str] = None,
+    n_clusters: Optional[str] = None,
+    affinity: Optional[str] = None,
+    n_neighbors: Optional[int] = None,
+    eigen_solver: Optional[str] = None,
+    resolution: Optional[float] = None,
+    has_feature_weight: Optional[float] = None,
+    part_of_weight: Optional[float] = None,
+    relation_weight: Optional[float] = None,
+    seed: Optional[int] = None,
+    run_async: bool = Query(False, alias="async"),
+):
+
+    # -----------------------------
+    # Load indexed graph
+    # -----------------------------
+    graph = await run_in_threadpool(graph_store.get)
+    if graph is None:
+        return {"error": "static_graph.json not found"}
+
+    params = algorithm_params(algorithm, {
+        "k_min": k_min, "k_max": k_max, "criterion": criterion,
+        "n_clusters": n_clusters, "affinity": affinity, "n_neighbors": n_neighbors, "eigen_solver": eigen_solver,
+        "resolution": resolution, "has_feature_weight": has_feature_weight, "part_of_weight": part_of_weight,
+        "relation_weight": relation_weight, "seed": seed,
+    })
+    start = time.perf_counter()
+    profile = request_profile()
+    if profile is not None:
+        profile.files.append(profile.worker_path)
+    job, source = cluster_jobs.submit(
+        graph.version, algorithm, params, profile_path=profile.worker_path if profile else None,
+    )
+
+    # ?async=true: answer at once; poll GET /cluster/{job_id} or its /events stream
+    if run_async:
+        return JSONResponse(job.describe(), status_code=202)
+
+    await asyncio.wrap_future(job.done)
+    CLUSTER_LATENCY.observe(time.perf_counter() - start, algorithm=algorithm_label(algorithm), source=source)
+
+    # Worker-side stages of a result computed for this request, for Server-Timing
+    timer = request_timer()
+    if timer is not None and source in ("computed", "coalesced") and job.status == "done":
+        for stage, ms in job.result.get("timings", {}).items():
+            timer.add(f"cluster.{stage}", ms)
+
+    # Bad parameters are a 400, like the graph queries; a failed job is ours
+    if job.status != "done":
+        return JSONResponse(job.response(), status_code=500)
+    return query_response(job.result)
+
+
+@app.get("/cluster/cache")
+def cluster_cache_stats():
+    return {**cluster_cache.stats(), "jobs": cluster_jobs.stats(), "analytics": analytics_bundle.stats()}
+
+
+@app.get("/cluster/{job_id}")
+async def cluster_job(job_id: str, wait: float = 0):
+    job = cluster_jobs.get(job_id)
+    if job is None:
+        return JSONResponse({"error": f"Unknown job: {job_id}"}, status_code=404)
+
+    # Optional long poll: hold the request up to `wait` seconds for the result
+    if wait > 0:
         try:
-            from scipy.cluster.hierarchy import linkage, fcluster
-            Z_bots = linkage(df, method='average', metric='jaccard')
-            
-            best_k = 2
-            best_score = -1
-            max_k = min(8, len(df) - 1)
-            
-            if max_k >= 2:
-                for k in range(2, max_k + 1):
-                    labels_temp = fcluster(Z_bots, k, criterion='maxclust')
-                    if len(set(labels_temp)) > 1:
-                        score = silhouette_score(df, labels_temp, metric='jaccard')
-                        if score > best_score:
-                            best_score = score
-                            best_k = k
-                n_clusters = best_k
-            else:
-                n_clusters = 2
-
-            labels = fcluster(Z_bots, n_clusters, criterion='maxclust')
-            
-            # Note: fcluster returns 1-indexed. Let's make it 0-indexed to match.
-            labels = labels - 1
-
-        except Exception as e:
-            # Fallback
-            print(f"Silhouette failed, falling back to basic layout: {e}")
-            ac = AgglomerativeClustering(n_clusters=4, metric='precomputed', linkage='average')
-            labels = ac.fit_predict(dist_mat)
-            n_clusters = 4
-        
-        # 3. Assign to Bots
-        for i, b in enumerate(bot_list):
-            clusters[b] = int(labels[i])
-            
-        # 4. Propagate to Features/Domains (Simple Majority Vote)
-        for fid, b_list in feature_to_bots.items():
-            counts = {}
-            for b in b_list:
-                if b in clusters:
-                    c = clusters[b]
-                    counts[c] = counts.get(c, 0) + 1
-            if counts:
-                best_c = max(counts, key=counts.get)
-                clusters[fid] = best_c
-        
-        domain_votes = {}
-        for edge in data["edges"]:
-            src = edge["data"]["source"]
-            tgt = edge["data"]["target"]
-            rel = edge["data"].get("relation")
-            if rel == "partOf" and src in bots and tgt in domains:
-                if src in clusters:
-                    c = clusters[src]
-                    domain_votes.setdefault(tgt, {}).setdefault(c, 0)
-                    domain_votes[tgt][c] += 1
-        
-        for d, counts in domain_votes.items():
-            if counts:
-                best_c = max(counts, key=counts.get)
-                clusters[d] = best_c
-
-        # 5. Build Feature Analysis Object
-        analysis_data = []
-        df_clustered = df.copy()
-        df_clustered['Cluster'] = [clusters[b] for b in df_clustered.index]
-        global_presence = df.mean()
-        
-        for cluster_id in sorted(df_clustered['Cluster'].unique()):
-            cluster_bots_df = df_clustered[df_clustered['Cluster'] == cluster_id].drop(columns=['Cluster'])
-            bots_in_cluster = cluster_bots_df.index.tolist()
-            cluster_presence = cluster_bots_df.mean()
-            
-            feature_metrics = []
-            for feature in sorted_features:
-                g_rate = global_presence[feature]
-                c_rate = cluster_presence[feature]
-                
-                # We only care about features actually present in the cluster
-                if c_rate > 0:
-                    # Option 2: Unique Prominence (Cluster Frequency / Global Frequency)
-                    score = float(c_rate) / float(g_rate) if g_rate > 0 else 0.0
-                    
-                    feature_metrics.append({
-                        'feature_id': feature,
-                        # Pass these as float to keep type safety
-                        'cluster_presence': round(float(c_rate), 3),
-                        'global_presence': round(float(g_rate), 3),
-                        'score': round(score, 2)
-                    })
-            
-            # Sort by the new score descending
-            feature_metrics.sort(key=lambda x: x['score'], reverse=True)
-            
-            # Send top 5 most defining features
-            top_features = feature_metrics[:5]
-            
-            # Normalize scores for visual bars (0-100% relative to the highest score in this cluster)
-            max_score = top_features[0]['score'] if top_features else 1.0
-            for fm in top_features:
-                fm['normalized_score'] = round(fm['score'] / max_score if max_score > 0 else 0, 3)
-            
-            analysis_data.append({
-                'cluster_id': int(cluster_id),
-                'bots': bots_in_cluster,
-                'top_features': top_features
-            })
-
-        return {"clusters": clusters, "analysis": analysis_data}
-
-    else:
-        return {"error": f"Unknown algorithm: {algorithm}"}
-
-    return {"clusters": clusters}
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(job.done)), min(wait, 60))
+        except asyncio.TimeoutError:
+            pass
+
+    return job.describe()
+
+
+@app.get("/cluster/{job_id}/events")
+async def cluster_job_events(job_id: str):
+    job = cluster_jobs.get(job_id)
+    if job is None:
+        return JSONResponse({"error": f"Unknown job: {job_id}"}, status_code=404)
+
+    def event(name, data):
+        return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+    # Server-sent events: the current status now, the final state when done
+    async def stream():
+        yield event("status", {"job_id": job.id, "status": job.describe()["status"]})
+        await asyncio.wrap_future(job.done)
+        yield event("result" if job.status == "done" else "error", job.describe())
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 
 # -----------------------------
-# Mount static frontend
+# Static frontend
 # -----------------------------
+# Indexed once at startup (see static_assets.py): in-memory, precompressed
+# text assets, fingerprinted script/stylesheet URLs and immutable caching.
+# Files outside the index are looked up on disk, so the route is a plain
+# def and runs in the threadpool, off the event loop.
 frontend_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend")
-app.mount("/assets", StaticFiles(directory=os.path.join(frontend_path, "assets")), name="assets")
-
-
-@app.get("/{file_path:path}")
-async def serve_frontend(file_path: str):
-    if file_path == "" or file_path == "/":
-        return FileResponse(os.path.join(frontend_path, "index.html"))
+frontend_index = StaticIndex(frontend_path)
 
-    full_path = os.path.join(frontend_path, file_path)
-    if os.path.exists(full_path) and os.path.isfile(full_path):
-        return FileResponse(full_path)
 
-    return FileResponse(os.path.join(frontend_path, "index.html"))
+@app.api_route("/{file_path:path}", methods=["GET", "HEAD"])
+def serve_frontend(request: Request, file_path: str):
+    return frontend_index.response(request, file_path)
@@ -0,0 +1,166 @@
+import bisect
+import math
+import threading
+
+# -------------------------------------------------
+# Prometheus metrics
+# -------------------------------------------------
+# A minimal in-process registry rendered in the Prometheus text format
+# (version 0.0.4) by GET /metrics. Counters and histograms with labels
+# only; no client library needed. Metrics are per server process;
+# /cluster stage timings are measured in the worker processes and
+# recorded here when their results come back.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers cached lookups (sub-millisecond) up to slow clusterings
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._samples(key, value))
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self, key, value):
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"]
+
+
+class Gauge(Metric):
+    """A value read when rendering, from `function` returning {label tuple: value}."""
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), function=None):
+        super().__init__(name, help, labelnames)
+        self.function = function
+
+    def render(self):
+        if self.function is not None:
+            values = self.function()
+            with self._lock:
+                self._values = {tuple(str(v) for v in k): v2 for k, v2 in values.items()}
+        return super().render()
+
+    def _samples(self, key, value):
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def _samples(self, key, value):
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            le = (("le", _number(bound)),)
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# -----------------------------
+# Server metrics
+# -----------------------------
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "grace_http_requests_total", "HTTP requests by route template and status.",
+    ("method", "route", "status"),
+))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "grace_http_request_duration_seconds", "HTTP request latency (until the response is sent).",
+    ("method", "route"),
+))
+CLUSTER_REQUESTS = REGISTRY.register(Counter(
+    "grace_cluster_requests_total",
+    "POST /cluster requests by how they were answered (bundle, cache, coalesced, computed).",
+    ("algorithm", "source"),
+))
+CLUSTER_LATENCY = REGISTRY.register(Histogram(
+    "grace_cluster_request_duration_seconds", "POST /cluster latency, including waiting for the job.",
+    ("algorithm", "source"),
+))
+CLUSTER_COMPUTE = REGISTRY.register(Histogram(
+    "grace_cluster_compute_seconds", "Clustering time in the worker process (algorithm plus positions).",
+    ("algorithm",),
+))
+CLUSTER_STAGES = REGISTRY.register(Histogram(
+    "grace_cluster_stage_seconds", "Clustering time per stage, in the worker process.",
+    ("algorithm", "stage"),
+))
+GRAPH_LOAD_STAGES = REGISTRY.register(Histogram(
+    "grace_graph_load_seconds", "Time per stage of loading a new graph version.",
+    ("source", "stage"),
+))
@@ -0,0 +1,96 @@
+import numpy as np
+from scipy import sparse
+
+# -------------------------------------------------
+# Per-cluster feature prominence
+# -------------------------------------------------
+# Shared by clustering.agglomerative (the "analysis" in /cluster) and
+# clustering_analysis.py. Feature presence for every cluster at once is
+# one product of a bot x cluster indicator matrix with the bot x feature
+# incidence matrix, instead of a DataFrame slice and a feature loop per
+# cluster.
+
+
+def cluster_presence(matrix, labels, cluster_ids=None):
+    """
+    Share of bots having each feature, per cluster and overall.
+
+    labels: cluster label per row of matrix
+    cluster_ids: clusters to report, in order (default: sorted labels);
+      a cluster without bots gets NaN presence
+    Returns (cluster_ids, sizes, presence [clusters x features], global_presence).
+    """
+    X = sparse.csr_matrix(matrix, dtype=np.float64)
+    labels = np.asarray(labels)
+    if cluster_ids is None:
+        cluster_ids = np.unique(labels)
+    cluster_ids = np.asarray(cluster_ids)
+
+    position = {c: i for i, c in enumerate(cluster_ids.tolist())}
+    rows = [i for i, c in enumerate(labels.tolist()) if c in position]
+    cols = [position[labels[i].item()] for i in rows]
+    indicator = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, cols)), shape=(len(labels), len(cluster_ids)),
+    )
+
+    sizes = np.asarray(indicator.sum(axis=0)).ravel()
+    counts = (indicator.T @ X).toarray()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        presence = counts / sizes[:, None]
+    global_presence = np.asarray(X.sum(axis=0)).ravel() / X.shape[0]
+    return cluster_ids, sizes, presence, global_presence
+
+
+def top_features(c_rates, g_rates, features, top_k=5):
+    """
+    The top_k features of one cluster by prominence score (cluster presence /
+    global presence, rounded to 2 places), ties in feature order. Only
+    features present in the cluster count. Scores are normalized to the
+    highest one for the sidebar bars.
+    """
+    present = np.flatnonzero(c_rates > 0)
+    if len(present) == 0:
+        return []
+    with np.errstate(divide="ignore", invalid="ignore"):
+        raw = np.where(g_rates[present] > 0, c_rates[present] / g_rates[present], 0.0)
+
+    # Rounding can tie a feature outside the raw top_k with one inside, so
+    # keep everything that could round level with the k-th score, then
+    # rank that short list exactly
+    if len(present) > top_k:
+        kth = np.partition(raw, len(raw) - top_k)[len(raw) - top_k]
+        keep = raw >= kth - 0.02
+        present, raw = present[keep], raw[keep]
+
+    ranked = sorted(
+        ((round(float(s), 2), j) for j, s in zip(present.tolist(), raw)),
+        key=lambda item: (-item[0], item[1]),
+    )[:top_k]
+
+    result = [
+        {
+            "feature_id": features[j],
+            "cluster_presence": round(float(c_rates[j]), 3),
+            "global_presence": round(float(g_rates[j]), 3),
+            "score": score,
+        }
+        for score, j in ranked
+    ]
+    max_score = result[0]["score"]
+    for fm in result:
+        fm["normalized_score"] = round(fm["score"] / max_score if max_score > 0 else 0, 3)
+    return result
+
+
+def cluster_analysis(matrix, labels, bots, features, top_k=5):
+    """The /cluster "analysis" list: members and top features per cluster, by cluster id."""
+    labels = np.asarray(labels)
+    cluster_ids, _, presence, global_presence = cluster_presence(matrix, labels)
+    return [
+        {
+            "cluster_id": int(c),
+            "bots": [bots[i] for i in np.flatnonzero(labels == c)],
+            "top_features": top_features(presence[k], global_presence, features, top_k),
+        }
+        for k, c in enumerate(cluster_ids.tolist())
+    ]
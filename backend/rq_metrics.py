@@ -0,0 +1,75 @@
+import numpy as np
+from scipy import sparse
+
+# -------------------------------------------------
+# Research question metrics per feature
+# -------------------------------------------------
+# Shared by the API (/metrics/rq) and analyze_rq.py:
+#
+#   RQ1: Domain Specificity (Entropy of the feature's domain distribution)
+#   RQ2: Consistency (Ubiquity, share of all bots having the feature)
+#
+# All features are computed at once: per-domain counts are the product of
+# a bot x domain one-hot matrix and the bot x feature incidence matrix.
+
+
+def domain_indicator(bots, bot_domain, domains):
+    """Sparse bot x domain one-hot matrix; bots without a known domain get an empty row."""
+    domain_index = {d: j for j, d in enumerate(domains)}
+    rows, cols = [], []
+    for i, bot in enumerate(bots):
+        j = domain_index.get(bot_domain.get(bot))
+        if j is not None:
+            rows.append(i)
+            cols.append(j)
+    return sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+        shape=(len(bots), len(domains)),
+    )
+
+
+def feature_metrics(matrix, bots, features, bot_domain, domains):
+    """
+    One row per feature, in column order:
+      Ubiquity: share of all bots having the feature
+      Occurrences: number of bots having the feature
+      Entropy: Shannon entropy (base 2) over domains. Higher = more
+        distributed (domain independent), lower = domain specific
+      Top_Domain: domain with most occurrences (first in `domains` on ties)
+      Domain_Concentration: share of occurrences in the top domain
+    """
+    X = sparse.csr_matrix(matrix, dtype=np.int32)
+    D = domain_indicator(bots, bot_domain, domains)
+
+    occurrences = np.asarray(X.sum(axis=0)).ravel()
+    counts = (D.T @ X).toarray()  # domains x features
+    in_domains = counts.sum(axis=0)
+
+    n_bots = len(bots)
+    ubiquity = occurrences / n_bots if n_bots > 0 else np.zeros(len(features))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        probs = counts / in_domains
+        logs = np.where(counts > 0, np.log2(probs), 0.0)
+    # + 0.0 turns the -0.0 of single-domain features into 0.0
+    entropy = -(np.where(counts > 0, probs, 0.0) * logs).sum(axis=0) + 0.0
+
+    if len(domains):
+        top = counts.argmax(axis=0)
+        top_counts = counts[top, np.arange(len(features))]
+    else:
+        top = top_counts = np.zeros(len(features), dtype=int)
+
+    rows = []
+    for j, feature in enumerate(features):
+        total = int(occurrences[j])
+        has_domain = total > 0 and in_domains[j] > 0
+        rows.append({
+            "Feature": feature,
+            "Ubiquity": round(float(ubiquity[j]), 3),
+            "Occurrences": total,
+            "Entropy": round(float(entropy[j]), 3) if has_domain else 0,
+            "Top_Domain": domains[top[j]] if has_domain else "None",
+            "Domain_Concentration": round(float(top_counts[j]) / total, 3) if has_domain else 0,
+        })
+    return rows
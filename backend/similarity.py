@@ -0,0 +1,193 @@
+import threading
+
+import numpy as np
+
+# -------------------------------------------------
+# Feature co-occurrence and bot similarity
+# -------------------------------------------------
+# Precomputed from the bot x feature incidence matrix X:
+#
+# - feature x feature co-occurrence C = X^T X (C[i, j] = bots having both);
+# - for every bot, its TOP_K most similar bots by cosine similarity of
+#   their feature sets.
+#
+# Queries only slice ready-made lists. When the graph is rebuilt, only
+# the bots whose features changed (and the bots and features they touch)
+# are recomputed.
+
+TOP_K = 50
+# Bots per block when computing similarities, bounding memory to
+# BLOCK x n instead of n x n
+BLOCK = 1024
+
+
+def _ranked(ids, scores, k):
+    """Positions of the k highest scores, ties broken by id position."""
+    order = np.lexsort((ids, -scores))
+    return order[:k]
+
+
+class SimilarityIndex:
+    """Co-occurrence matrix and top-k neighbor lists for one incidence matrix."""
+
+    def __init__(self, incidence, top_k=TOP_K):
+        self.top_k = top_k
+        self.bots = incidence.bots
+        self.features = incidence.features
+        self.bot_index = incidence.bot_index
+        self.feature_index = incidence.feature_index
+
+        self.matrix = incidence.matrix.astype(np.int32).tocsr()
+        self.matrix.sort_indices()
+        self.cooccurrence = (self.matrix.T @ self.matrix).tocsr()
+        self.feature_degree = self.cooccurrence.diagonal()
+        self.bot_degree = np.asarray(self.matrix.sum(axis=1)).ravel()
+
+        self.cooccurring = [None] * len(self.features)
+        self._rank_features(range(len(self.features)))
+        self.similar = [None] * len(self.bots)
+        self._rank_bots(np.arange(len(self.bots)))
+
+    # -----------------------------
+    # Ranking
+    # -----------------------------
+    def _rank_features(self, columns):
+        C = self.cooccurrence
+        d = self.feature_degree
+        for j in columns:
+            start, end = C.indptr[j], C.indptr[j + 1]
+            ids, counts = C.indices[start:end], C.data[start:end]
+            keep = (ids != j) & (counts > 0)
+            ids, counts = ids[keep], counts[keep]
+            top = _ranked(ids, counts, self.top_k)
+            jaccard = counts[top] / (d[j] + d[ids[top]] - counts[top])
+            self.cooccurring[j] = list(zip(ids[top].tolist(), counts[top].tolist(), jaccard.tolist()))
+
+    def _rank_bots(self, rows):
+        X = self.matrix
+        d = self.bot_degree.astype(np.float64)
+        for start in range(0, len(rows), BLOCK):
+            block = rows[start:start + BLOCK]
+            shared = (X[block] @ X.T).toarray()
+            with np.errstate(divide="ignore", invalid="ignore"):
+                sim = shared / np.sqrt(np.outer(d[block], d))
+            for i, row in enumerate(block):
+                ids = np.flatnonzero(shared[i])
+                ids = ids[ids != row]
+                scores = sim[i, ids]
+                top = _ranked(ids, scores, self.top_k)
+                self.similar[row] = list(zip(
+                    ids[top].tolist(), scores[top].tolist(), shared[i, ids[top]].tolist(),
+                ))
+
+    # -----------------------------
+    # Incremental update
+    # -----------------------------
+    def updated(self, incidence):
+        """
+        Index for a newer incidence matrix. If the bots and features are
+        the same, only the changed rows are folded in and only the
+        affected lists are re-ranked; otherwise everything is rebuilt.
+        """
+        if incidence.bots != self.bots or incidence.features != self.features:
+            return SimilarityIndex(incidence, self.top_k)
+
+        new = incidence.matrix.astype(np.int32).tocsr()
+        new.sort_indices()
+        changed = np.unique((self.matrix != new).nonzero()[0])
+        index = object.__new__(SimilarityIndex)
+        index.__dict__.update(self.__dict__)
+        index.matrix = new
+        if len(changed) == 0:
+            return index
+
+        old_rows, new_rows = self.matrix[changed], new[changed]
+        index.cooccurrence = (
+            self.cooccurrence - old_rows.T @ old_rows + new_rows.T @ new_rows
+        ).tocsr()
+        index.cooccurrence.eliminate_zeros()
+        index.feature_degree = index.cooccurrence.diagonal()
+        index.bot_degree = np.asarray(new.sum(axis=1)).ravel()
+
+        # Features of the changed bots (before or after) have new counts,
+        # and the features they co-occur with have new Jaccard scores
+        columns = np.union1d(old_rows.indices, new_rows.indices)
+        columns = np.union1d(
+            self.cooccurrence[columns].indices, index.cooccurrence[columns].indices,
+        )
+        index.cooccurring = list(self.cooccurring)
+        index._rank_features(columns)
+
+        # Bots sharing a feature with a changed bot (before or after) have
+        # new similarities to it; every other list is unaffected
+        touched = (self.matrix @ old_rows.T + new @ new_rows.T).tocoo().row
+        rows = np.union1d(changed, touched)
+        index.similar = list(self.similar)
+        index._rank_bots(rows)
+        return index
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def _check_k(self, k):
+        if k < 1 or k > self.top_k:
+            return {"error": f"k must be between 1 and {self.top_k}"}
+        return None
+
+    def cooccurring_features(self, feature_id, k=10):
+        """Features most often found on the same bots as feature_id."""
+        error = self._check_k(k)
+        if error:
+            return error
+        j = self.feature_index.get(feature_id)
+        if j is None:
+            return {"error": f"Unknown feature: {feature_id}"}
+        return {
+            "feature": feature_id,
+            "bots": int(self.feature_degree[j]),
+            "cooccurring": [
+                {"id": self.features[c], "count": count, "jaccard": round(jaccard, 6)}
+                for c, count, jaccard in self.cooccurring[j][:k]
+            ],
+        }
+
+    def similar_bots(self, bot_id, k=10):
+        """Bots with the most similar feature sets to bot_id (cosine)."""
+        error = self._check_k(k)
+        if error:
+            return error
+        i = self.bot_index.get(bot_id)
+        if i is None:
+            return {"error": f"Unknown bot: {bot_id}"}
+        return {
+            "bot": bot_id,
+            "features": int(self.bot_degree[i]),
+            "similar": [
+                {"id": self.bots[b], "similarity": round(score, 6), "shared": shared}
+                for b, score, shared in self.similar[i][:k]
+            ],
+        }
+
+
+class SimilarityStore:
+    """
+    Holds the SimilarityIndex of the current graph version. A new version
+    is indexed incrementally from the previous one.
+    """
+
+    def __init__(self):
+        self._index = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self, graph):
+        if self._version == graph.version:
+            return self._index
+        with self._lock:
+            if self._version != graph.version:
+                if self._index is None:
+                    index = SimilarityIndex(graph.incidence)
+                else:
+                    index = self._index.updated(graph.incidence)
+                self._index, self._version = index, graph.version
+            return self._index
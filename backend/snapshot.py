@@ -0,0 +1,275 @@
+import gzip
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+
+import numpy as np
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# -------------------------------------------------
+# Binary graph snapshot (static_graph.bin)
+# -------------------------------------------------
+# Written by build_graph.py next to static_graph.json and memory-mapped by
+# the server instead of parsing the JSON. Layout:
+#
+#   MAGIC | uint32 format version | uint32 header length | header (JSON)
+#   | 64-byte aligned raw arrays
+#
+# The header lists every array (offset, dtype, shape) and how to rebuild
+# element data. Strings are interned into one UTF-8 blob with an offsets
+# array; node/edge attributes are columns of indices into it, edges are
+# integer node-index arrays, node positions are an (n, 2) float array,
+# and the /graph body (plus gzip/brotli
+# variants) and the bot x feature incidence matrix are stored as arrays.
+
+MAGIC = b"GRACESNP"
+FORMAT_VERSION = 2
+ALIGN = 64
+
+
+def compact_json(graph):
+    """The /graph response body. Server and snapshot must serialize identically."""
+    return json.dumps(graph, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+# -------------------------------------------------
+# Writing
+# -------------------------------------------------
+
+class _Strings:
+    def __init__(self):
+        self.index = {}
+
+    def add(self, s):
+        return self.index.setdefault(s, len(self.index))
+
+    def arrays(self):
+        encoded = [s.encode("utf-8") for s in self.index]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _columns(elements, strings, node_index, prefix, arrays):
+    """Encode element data dicts as typed columns; returns the header spec."""
+    datas = [el["data"] for el in elements]
+
+    layouts = {}
+    layout_ids = np.zeros(len(datas), dtype=np.int32)
+    for i, d in enumerate(datas):
+        layout_ids[i] = layouts.setdefault(tuple(d), len(layouts))
+    arrays[f"{prefix}_layout"] = layout_ids
+
+    keys = list(dict.fromkeys(k for layout in layouts for k in layout))
+    columns = {}
+    for key in keys:
+        values = [d.get(key) for d in datas]
+        present = [v for v in values if v is not None]
+        if key in ("source", "target") and all(isinstance(v, str) and v in node_index for v in present):
+            kind = "node"
+            col = np.array([node_index[v] if v is not None else -1 for v in values], dtype=np.int32)
+        elif all(isinstance(v, bool) for v in present):
+            kind = "bool"
+            col = np.array([-1 if v is None else int(v) for v in values], dtype=np.int8)
+        elif all(isinstance(v, str) for v in present):
+            kind = "str"
+            col = np.array([-1 if v is None else strings.add(v) for v in values], dtype=np.int32)
+        else:
+            kind = "json"
+            col = np.array(
+                [-1 if key not in d else strings.add(json.dumps(d[key], ensure_ascii=False)) for d in datas],
+                dtype=np.int32,
+            )
+        columns[key] = kind
+        arrays[f"{prefix}_col_{key}"] = col
+
+    return {"layouts": [list(layout) for layout in layouts], "columns": columns}
+
+
+def snapshot_bytes(graph, incidence, source_stat):
+    """
+    Serialize a graph dict (plus its Incidence, bots in file order and
+    features sorted, as the server uses it) into snapshot bytes.
+    source_stat is the os.stat_result of the static_graph.json it mirrors.
+    """
+    strings = _Strings()
+    arrays = {}
+
+    node_index = {}
+    for i, node in enumerate(graph["nodes"]):
+        node_index.setdefault(node["data"]["id"], i)
+
+    for el in graph["nodes"] + graph["edges"]:
+        if set(el) - {"data", "position"}:
+            raise ValueError(f"Unsupported element keys: {sorted(set(el) - {'data', 'position'})}")
+
+    nodes_spec = _columns(graph["nodes"], strings, node_index, "node", arrays)
+    if any("position" in n for n in graph["nodes"]):
+        # NaN marks nodes without a position
+        arrays["node_position"] = np.array(
+            [(n["position"]["x"], n["position"]["y"]) if "position" in n else (np.nan, np.nan)
+             for n in graph["nodes"]],
+            dtype=np.float64,
+        ).reshape(-1, 2)
+    edges_spec = _columns(graph["edges"], strings, node_index, "edge", arrays)
+
+    # Incidence matrix (CSR) with rows / columns as node indices
+    matrix = incidence.matrix.tocsr()
+    arrays["inc_indptr"] = matrix.indptr.astype(np.int64)
+    arrays["inc_indices"] = matrix.indices.astype(np.int32)
+    arrays["inc_rows"] = np.array([node_index[b] for b in incidence.bots], dtype=np.int32)
+    arrays["inc_cols"] = np.array([node_index[f] for f in incidence.features], dtype=np.int32)
+
+    # Pre-serialized /graph body and its compressed variants
+    body = compact_json(graph)
+    arrays["body"] = np.frombuffer(body, dtype=np.uint8)
+    arrays["body_gzip"] = np.frombuffer(gzip.compress(body, compresslevel=9, mtime=0), dtype=np.uint8)
+    if brotli is not None:
+        arrays["body_br"] = np.frombuffer(brotli.compress(body, quality=11), dtype=np.uint8)
+
+    arrays["str_blob"], arrays["str_offsets"] = strings.arrays()
+
+    # Lay out arrays after the header, each aligned
+    header = {
+        "source": {"size": source_stat.st_size, "mtime_ns": source_stat.st_mtime_ns},
+        "digest": hashlib.sha256(body).hexdigest(),
+        "n_nodes": len(graph["nodes"]),
+        "n_edges": len(graph["edges"]),
+        "nodes": nodes_spec,
+        "edges": edges_spec,
+        "arrays": {},
+    }
+
+    def layout(start):
+        offset, specs = start, {}
+        for name, arr in arrays.items():
+            offset = -(-offset // ALIGN) * ALIGN
+            specs[name] = {"offset": offset, "dtype": arr.dtype.str, "shape": list(arr.shape)}
+            offset += arr.nbytes
+        return specs
+
+    # Offsets depend on the header length: size the header with offsets at
+    # least as long as the real ones, then pad the real header to that size
+    prefix_len = len(MAGIC) + 8
+    header["arrays"] = layout(1 << 40)
+    data_start = -(-(prefix_len + len(json.dumps(header).encode("utf-8"))) // ALIGN) * ALIGN
+    header["arrays"] = layout(data_start)
+    header_bytes = json.dumps(header).encode("utf-8").ljust(data_start - prefix_len)
+
+    out = bytearray(MAGIC + struct.pack("<II", FORMAT_VERSION, len(header_bytes)) + header_bytes)
+    for name, arr in arrays.items():
+        out.extend(b"\0" * (header["arrays"][name]["offset"] - len(out)))
+        out.extend(arr.tobytes())
+    return bytes(out)
+
+
+# -------------------------------------------------
+# Reading
+# -------------------------------------------------
+
+class Snapshot:
+    """Read-only, memory-mapped view of a snapshot file."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a graph snapshot")
+        version, header_len = struct.unpack_from("<II", self._mm, len(MAGIC))
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format version {version}")
+
+        start = len(MAGIC) + 8
+        self.header = json.loads(bytes(self._mm[start:start + header_len]))
+        self.digest = self.header["digest"]
+        self._strings = {}
+
+    def matches(self, source_stat):
+        """True if the snapshot was written from the JSON file with this stat."""
+        src = self.header["source"]
+        return src["size"] == source_stat.st_size and src["mtime_ns"] == source_stat.st_mtime_ns
+
+    def array(self, name):
+        spec = self.header["arrays"].get(name)
+        if spec is None:
+            return None
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        return np.frombuffer(self._mm, dtype=dtype, count=count, offset=spec["offset"]).reshape(spec["shape"])
+
+    def bytes_view(self, name):
+        """Zero-copy memoryview of a uint8 array (e.g. the /graph body)."""
+        spec = self.header["arrays"].get(name)
+        if spec is None:
+            return None
+        start = spec["offset"]
+        return memoryview(self._mm)[start:start + spec["shape"][0]]
+
+    def string(self, i):
+        s = self._strings.get(i)
+        if s is None:
+            offsets = self.array("str_offsets")
+            start, stop = offsets[i], offsets[i + 1]
+            s = self._strings[i] = self.bytes_view("str_blob")[start:stop].tobytes().decode("utf-8")
+        return s
+
+    def strings(self, indices):
+        """Decode a column of string indices (-1 = absent -> None)."""
+        return [None if i < 0 else self.string(int(i)) for i in indices]
+
+    def column(self, kind, key):
+        """Raw column array of "node" or "edge" attribute `key`, or None."""
+        return self.array(f"{kind}_col_{key}")
+
+    def elements(self, kind):
+        """Rebuild the list of {"data": {...}} dicts for "node" or "edge"."""
+        spec = self.header[kind + "s"]
+        layouts = spec["layouts"]
+        layout_ids = self.array(f"{kind}_layout")
+        node_ids = self.strings(self.column("node", "id"))
+
+        decoded = {}
+        for key, ckind in spec["columns"].items():
+            col = self.column(kind, key)
+            if ckind == "node":
+                decoded[key] = [node_ids[i] if i >= 0 else None for i in col]
+            elif ckind == "bool":
+                decoded[key] = [None if v < 0 else bool(v) for v in col]
+            elif ckind == "str":
+                decoded[key] = self.strings(col)
+            else:
+                decoded[key] = [None if i < 0 else json.loads(self.string(int(i))) for i in col]
+
+        elements = [
+            {"data": {key: decoded[key][i] for key in layouts[layout]}}
+            for i, layout in enumerate(layout_ids)
+        ]
+
+        positions = self.array("node_position") if kind == "node" else None
+        if positions is not None:
+            for el, (x, y) in zip(elements, positions.tolist()):
+                if not math.isnan(x):
+                    el["position"] = {"x": x, "y": y}
+        return elements
+
+    def graph(self):
+        return {"nodes": self.elements("node"), "edges": self.elements("edge")}
+
+
+def load_snapshot(path, source_path):
+    """Snapshot at `path` if it exists and mirrors `source_path`, else None."""
+    try:
+        snap = Snapshot(path)
+        if snap.matches(os.stat(source_path)):
+            return snap
+    except (OSError, ValueError):
+        pass
+    return None
@@ -0,0 +1,90 @@
+import numpy as np
+from scipy import sparse
+from scipy.linalg import eigh
+from scipy.sparse import csgraph
+from scipy.sparse.linalg import eigsh, lobpcg
+from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.neighbors import kneighbors_graph
+
+try:
+    import pyamg
+except ImportError:  # pyamg is optional, only the "amg" solver needs it
+    pyamg = None
+
+# -------------------------------------------------
+# Spectral clustering helpers
+# -------------------------------------------------
+# Affinities and Laplacian spectra for clustering.spectral. The kNN
+# affinity is sparse (about n_neighbors entries per row), so memory grows
+# linearly with the number of bots instead of quadratically.
+
+AFFINITIES = ("cosine", "knn")
+EIGEN_SOLVERS = ("arpack", "lobpcg", "amg")
+# Below this size (or when too few rows per eigenvector for lobpcg) the
+# Laplacian is small enough to decompose densely
+DENSE_LIMIT = 500
+
+
+def cosine_affinity(X):
+    """Dense n x n cosine similarity between the rows of X."""
+    return cosine_similarity(X)
+
+
+def knn_affinity(X, n_neighbors=10):
+    """
+    Sparse, symmetric cosine-similarity graph keeping each row's
+    n_neighbors most similar rows (capped at n - 1).
+    """
+    n = X.shape[0]
+    n_neighbors = max(1, min(n_neighbors, n - 1))
+    dist = kneighbors_graph(X, n_neighbors, mode="distance", metric="cosine", include_self=False)
+    sim = dist.tocsr(copy=True)
+    sim.data = np.clip(1.0 - sim.data, 0.0, 1.0)
+    # Keep an edge if either endpoint chose it
+    return sim.maximum(sim.T).tocsr()
+
+
+def laplacian_spectrum(affinity, n_eigenvalues, eigen_solver="arpack", random_state=42):
+    """
+    The n_eigenvalues smallest eigenvalues of the normalized graph
+    Laplacian of `affinity` (dense or sparse), in ascending order.
+    """
+    n = affinity.shape[0]
+    m = min(n_eigenvalues, n)
+    L = csgraph.laplacian(affinity, normed=True)
+
+    if n <= DENSE_LIMIT or n < 5 * m:
+        L = L.toarray() if sparse.issparse(L) else L
+        return eigh(L, eigvals_only=True, subset_by_index=[0, m - 1])
+
+    L = sparse.csr_matrix(L)
+    if eigen_solver in ("lobpcg", "amg"):
+        rng = np.random.default_rng(random_state)
+        X0 = rng.standard_normal((n, m))
+        M = None
+        if eigen_solver == "amg":
+            if pyamg is None:
+                raise ValueError("eigen_solver 'amg' requires pyamg")
+            # Small diagonal shift: the Laplacian itself is singular
+            shifted = L + 1e-5 * sparse.identity(n, format="csr")
+            M = pyamg.smoothed_aggregation_solver(shifted).aspreconditioner()
+        values, _ = lobpcg(L, X0, M=M, largest=False, tol=1e-5, maxiter=2000)
+    else:
+        # Shift-invert around 1 on -L finds the eigenvalues of L closest to 0
+        values = -eigsh(-L, k=m, sigma=1.0, which="LM", return_eigenvectors=False)
+
+    return np.sort(values)
+
+
+def eigengap_k(eigenvalues, k_min=2, k_max=8):
+    """
+    Number of clusters with the largest gap between consecutive Laplacian
+    eigenvalues (λ_{k+1} - λ_k) for k in [k_min, k_max].
+    Returns (k, gaps) where gaps maps k -> gap.
+    """
+    k_max = min(k_max, len(eigenvalues) - 1)
+    gaps = {k: float(eigenvalues[k] - eigenvalues[k - 1]) for k in range(k_min, k_max + 1)}
+    if not gaps:
+        return k_min, gaps
+    best = max(gaps, key=lambda k: (gaps[k], -k))
+    return best, gaps
@@ -0,0 +1,170 @@
+import mimetypes
+import os
+import re
+import threading
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+from .http_cache import IMMUTABLE, CachedPayload, is_not_modified, payload_response
+
+# -------------------------------------------------
+# Frontend files
+# -------------------------------------------------
+# serve_frontend answers from an index of frontend/ built once at startup:
+#
+# - text assets (JS, CSS, HTML, ...) are held in memory as CachedPayloads,
+#   with gzip / brotli variants compressed in the background;
+# - every text asset also has a fingerprinted URL (style.<hash>.css),
+#   and index.html is rewritten to use them, so those URLs are served
+#   with Cache-Control: immutable;
+# - other files (images) are streamed from disk by their known path.
+#
+# Lookups that miss the index only go to the disk for paths under assets/
+# (screenshot variants written while the server runs); the route itself is
+# a plain def, so that disk access happens in the threadpool.
+#
+# Edits to text assets are picked up on the next server start.
+
+mimetypes.add_type("image/avif", ".avif")
+mimetypes.add_type("image/webp", ".webp")
+
+COMPRESSIBLE = {".css", ".html", ".js", ".json", ".map", ".svg", ".txt"}
+# File names under these directories already carry a content hash
+HASHED_DIRS = ("assets/screenshots/derived/",)
+# Local script / stylesheet references in index.html to fingerprint
+REFERENCE = re.compile(r'(?P<attr>src|href)="(?P<url>(?:assets/)?[\w./-]+\.(?:css|js))(?:\?[^"]*)?"')
+
+
+class StaticEntry:
+    """One file under the frontend root."""
+
+    def __init__(self, rel, path, stat):
+        self.rel = rel
+        self.path = path
+        self.stat = stat
+        self.media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.immutable = rel.startswith(HASHED_DIRS)
+        self.payload = None
+
+    def load(self):
+        if os.path.splitext(self.rel)[1].lower() in COMPRESSIBLE:
+            with open(self.path, "rb") as f:
+                self.payload = CachedPayload(f.read(), self.stat.st_mtime, self.media_type)
+
+    @property
+    def fingerprinted(self):
+        """URL path with the content hash before the extension."""
+        stem, ext = os.path.splitext(self.rel)
+        return f"{stem}.{self.payload.digest[:12]}{ext}"
+
+
+class StaticIndex:
+    def __init__(self, root, index_file="index.html"):
+        self.root = os.path.realpath(root)
+        self.index_file = index_file
+        self.files = {}
+        self.aliases = {}
+        self.index_payload = None
+        self._lock = threading.Lock()
+
+    # -----------------------------
+    # Building
+    # -----------------------------
+    def load(self):
+        files, aliases = {}, {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                rel = os.path.relpath(path, self.root).replace(os.sep, "/")
+                entry = StaticEntry(rel, path, os.stat(path))
+                entry.load()
+                files[rel] = entry
+                if entry.payload is not None:
+                    aliases[entry.fingerprinted] = entry
+
+        index = files.get(self.index_file)
+        index_payload = None
+        if index is not None:
+            def fingerprint(m):
+                ref = files.get(m.group("url"))
+                if ref is None or ref.payload is None:
+                    return m.group(0)
+                return f'{m.group("attr")}="{ref.fingerprinted}"'
+
+            html = REFERENCE.sub(fingerprint, index.payload.body.decode("utf-8"))
+            index_payload = CachedPayload(html.encode("utf-8"), index.stat.st_mtime, "text/html")
+
+        with self._lock:
+            self.files, self.aliases, self.index_payload = files, aliases, index_payload
+
+    def precompress(self):
+        """Compute every gzip / brotli variant up front (run in a background thread)."""
+        payloads = [e.payload for e in self.files.values() if e.payload is not None]
+        if self.index_payload is not None:
+            payloads.append(self.index_payload)
+        for payload in payloads:
+            payload.gzip
+            payload.br
+
+    def _from_disk(self, rel):
+        """Index a file created after startup (e.g. new screenshot variants)."""
+        path = os.path.realpath(os.path.join(self.root, rel))
+        if not path.startswith(self.root + os.sep) or not os.path.isfile(path):
+            return None
+        entry = StaticEntry(rel, path, os.stat(path))
+        entry.load()
+        with self._lock:
+            self.files[rel] = entry
+        return entry
+
+    # -----------------------------
+    # Serving
+    # -----------------------------
+    def response(self, request: Request, rel):
+        if self.index_payload is None and not self.files:
+            self.load()
+
+        rel = rel.lstrip("/")
+        if rel in ("", self.index_file):
+            return self._index_response(request)
+
+        entry = self.aliases.get(rel)
+        immutable = entry is not None
+        if entry is None:
+            entry = self.files.get(rel)
+            # Only assets/ gains files after startup; any other unknown path
+            # is a frontend route, answered without touching the disk
+            if entry is None and rel.startswith("assets/"):
+                entry = self._from_disk(rel)
+            immutable = entry is not None and entry.immutable
+
+        if entry is None:
+            # Missing assets are a 404; any other path is a frontend route
+            if rel.startswith("assets/"):
+                return Response(status_code=404)
+            return self._index_response(request)
+
+        cache_control = IMMUTABLE if immutable else "no-cache"
+        if entry.payload is not None:
+            return payload_response(request, entry.payload, cache_control=cache_control)
+
+        # Hashed files never change, so the indexed stat stays valid
+        try:
+            stat = entry.stat if immutable else os.stat(entry.path)
+        except FileNotFoundError:
+            with self._lock:
+                self.files.pop(entry.rel, None)
+            return Response(status_code=404)
+        response = FileResponse(
+            entry.path, stat_result=stat, media_type=entry.media_type,
+            headers={"Cache-Control": cache_control},
+        )
+        if is_not_modified(request, response.headers["etag"], stat.st_mtime):
+            return Response(status_code=304, headers={"ETag": response.headers["etag"], "Cache-Control": cache_control})
+        return response
+
+    def _index_response(self, request):
+        if self.index_payload is None:
+            return Response(status_code=404)
+        return payload_response(request, self.index_payload)
@@ -0,0 +1,127 @@
+# -------------------------------------------------
+# Server-side graph queries
+# -------------------------------------------------
+# Slices of static_graph.json answered from the GraphIndex lookups, so the
+# frontend can fetch only what it shows instead of the whole graph.
+# Every function returns elements in the same {"data": {...}} shape and
+# file order as /graph, or an {"error": ...} dict.
+
+MAX_HOPS = 3
+MAX_PAGE = 1000
+
+
+def induced_subgraph(graph, node_ids):
+    """Elements of the given nodes plus every edge between two of them."""
+    keep = set(node_ids)
+    nodes = graph.data["nodes"]
+    edges = graph.data["edges"]
+
+    positions = sorted(graph.node_position[n] for n in keep)
+    edge_positions = set()
+    for n in keep:
+        for i in graph.adjacency.get(n, []):
+            src, tgt, _ = graph.edge_list[i]
+            if src in keep and tgt in keep:
+                edge_positions.add(i)
+
+    return {
+        "nodes": [nodes[i] for i in positions],
+        "edges": [edges[i] for i in sorted(edge_positions)],
+    }
+
+
+def _unknown(graph, ids, node_type):
+    missing = [i for i in ids if graph.node_type.get(i) != node_type]
+    if missing:
+        return {"error": f"Unknown {node_type}: {', '.join(missing)}"}
+    return None
+
+
+def filtered_subgraph(graph, bots=None, domains=None, groups=None):
+    """
+    The part of the graph the sidebar filters would show.
+
+    Bots are the listed bots plus the bots of the listed domains (all bots
+    if neither is given). Features are those the selected bots have,
+    limited to the listed feature groups if any. The result also holds
+    the domains of the selected bots and the groups of the kept features.
+    """
+    bots = bots or []
+    domains = domains or []
+    groups = groups or []
+    for ids, node_type in ((bots, "bot"), (domains, "domain"), (groups, "feature_group")):
+        error = _unknown(graph, ids, node_type)
+        if error:
+            return error
+
+    if bots or domains:
+        selected = set(bots)
+        for d in domains:
+            selected.update(graph.domain_bots.get(d, []))
+    else:
+        selected = set(graph.bots)
+
+    wanted_groups = set(groups)
+    features = {
+        f
+        for b in selected
+        for f in graph.bot_features.get(b, ())
+        if not wanted_groups or graph.feature_group.get(f) in wanted_groups
+    }
+
+    keep = selected | features
+    keep.update(graph.bot_domain[b] for b in selected if b in graph.bot_domain)
+    keep.update(graph.feature_group[f] for f in features if f in graph.feature_group)
+    return induced_subgraph(graph, keep)
+
+
+def neighborhood(graph, node_id, hops=1):
+    """Induced subgraph of every node within `hops` edges of node_id (undirected)."""
+    if node_id not in graph.node_type:
+        return {"error": f"Unknown node: {node_id}"}
+    if not 0 <= hops <= MAX_HOPS:
+        return {"error": f"hops must be between 0 and {MAX_HOPS}"}
+
+    seen = {node_id}
+    frontier = [node_id]
+    for _ in range(hops):
+        next_frontier = []
+        for n in frontier:
+            for i in graph.adjacency.get(n, []):
+                src, tgt, _ = graph.edge_list[i]
+                other = tgt if src == n else src
+                if other not in seen:
+                    seen.add(other)
+                    next_frontier.append(other)
+        frontier = next_frontier
+
+    result = induced_subgraph(graph, seen)
+    result["center"] = node_id
+    result["hops"] = hops
+    return result
+
+
+def paginate(items, offset=0, limit=100):
+    """One page of a list, with the total for the client's pager."""
+    if offset < 0 or not 1 <= limit <= MAX_PAGE:
+        return {"error": f"offset must be >= 0 and limit between 1 and {MAX_PAGE}"}
+    return {
+        "total": len(items),
+        "offset": offset,
+        "limit": limit,
+        "items": items[offset:offset + limit],
+    }
+
+
+def node_page(graph, node_type=None, offset=0, limit=100):
+    nodes = graph.data["nodes"]
+    if node_type is not None:
+        nodes = [nodes[graph.node_position[n]] for n in graph.nodes_by_type.get(node_type, [])]
+    return paginate(nodes, offset, limit)
+
+
+def edge_page(graph, relation=None, offset=0, limit=100):
+    edges = graph.data["edges"]
+    if relation is not None:
+        edges = [edges[i] for i in graph.edge_positions.get(relation, [])]
+    return paginate(edges, offset, limit)
@@ -0,0 +1,51 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+class StageTimer:
+    """
+    Wall-clock time per named stage, in milliseconds.
+
+        timer = StageTimer()
+        with timer("affinity"):
+            ...
+        timer.as_dict()  # {"affinity": 1.234}
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def __call__(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+    def add(self, name, ms):
+        """Count `ms` milliseconds towards a stage timed elsewhere."""
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def as_dict(self):
+        return {name: round(ms, 3) for name, ms in self.stages.items()}
+
+    def server_timing(self):
+        """The stages as a Server-Timing header value."""
+        return ", ".join(f"{name};dur={ms:.3f}" for name, ms in self.stages.items())
+
+
+# -----------------------------
+# Per-request timer
+# -----------------------------
+# Set by the instrumentation middleware for every HTTP request; code on
+# the request's path (including sync routes, which run in a thread pool
+# with a copy of the context) adds stages to it for the Server-Timing
+# header. None outside a request, e.g. in /cluster worker processes.
+_request_timer = ContextVar("request_timer", default=None)
+
+
+def request_timer():
+    """StageTimer of the request being served, or None."""
+    return _request_timer.get()
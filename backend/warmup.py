@@ -0,0 +1,65 @@
+import threading
+import time
+
+# -------------------------------------------------
+# Background warm-up
+# -------------------------------------------------
+# The server starts accepting requests right away; heavy work that would
+# otherwise land on the first requests (loading the graph, building the
+# similarity lists, importing the analytics libraries in the clustering
+# workers, computing the clusterings the frontend asks for) runs here on
+# a background thread. GET /ready reports 503 until every step is done,
+# so load balancers and rolling restarts only send traffic to a warm
+# process. Requests arriving earlier still work: they load what they
+# need themselves.
+
+
+class WarmUp:
+    """
+    Named steps run in order on a daemon thread. A step that raises is
+    recorded as failed (and keeps the process unready); the others still run.
+    """
+
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.status = {name: "pending" for name, _ in self.steps}
+        self.errors = {}
+        self.durations = {}
+        self.started = None
+        self.finished = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self.started = time.time()
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        for name, step in self.steps:
+            self.status[name] = "running"
+            start = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                self.status[name] = "failed"
+                self.errors[name] = f"{type(e).__name__}: {e}"
+            else:
+                self.status[name] = "done"
+            self.durations[name] = round((time.perf_counter() - start) * 1000, 3)
+        self.finished = time.time()
+
+    @property
+    def ready(self):
+        return all(status == "done" for status in self.status.values())
+
+    def describe(self):
+        steps = {}
+        for name, _ in self.steps:
+            info = {"status": self.status[name]}
+            if name in self.durations:
+                info["ms"] = self.durations[name]
+            if name in self.errors:
+                info["error"] = self.errors[name]
+            steps[name] = info
+        return {"ready": self.ready, "started": self.started, "finished": self.finished, "steps": steps}
@@ -54,7 +54,8 @@ function getGroupColor(gid) {
 
 async function initGraph() {
     try {
-        const response = await fetch('/graph?v=' + new Date().getTime());
+        // 'no-cache' revalidates with the stored ETag, so an unchanged graph is a 304
+        const response = await fetch('/graph', { cache: 'no-cache' });
         const elements = await response.json();
 
         if (elements.error) {
@@ -216,7 +217,8 @@ async function initGraph() {
                     }
                 }
             ],
-            layout: {
+            // Positions precomputed by build_graph.py render instantly; fall back to cose otherwise
+            layout: elements.nodes.every(n => n.position) ? { name: 'preset', fit: true, padding: 50 } : {
                 name: 'cose',
                 animate: true,
                 animationDuration: 1000,
@@ -579,11 +581,20 @@ if (clusterBtn) {
             // Layout
             const paddingValue = algorithm === 'agglomerative' ? 150 : 30;
 
-            cy.layout({
-                name: 'fcose', quality: 'proof', randomize: false, animate: true, animationDuration: 1000,
-                fit: true, padding: paddingValue, nodeSeparation: 75, idealEdgeLength: 50, edgeElasticity: 0.45, nestingFactor: 0.1,
-                gravity: 0.25, numIter: 2500, tilingPaddingVertical: 20, tilingPaddingHorizontal: 20, initialEnergyOnIncremental: 0.3
-            }).run();
+            // Use the cluster layout computed by the backend when it is there
+            const positions = responseData.positions;
+            if (positions) {
+                cy.layout({
+                    name: 'preset', positions: node => positions[node.id()], animate: true, animationDuration: 1000,
+                    fit: true, padding: paddingValue
+                }).run();
+            } else {
+                cy.layout({
+                    name: 'fcose', quality: 'proof', randomize: false, animate: true, animationDuration: 1000,
+                    fit: true, padding: paddingValue, nodeSeparation: 75, idealEdgeLength: 50, edgeElasticity: 0.45, nestingFactor: 0.1,
+                    gravity: 0.25, numIter: 2500, tilingPaddingVertical: 20, tilingPaddingHorizontal: 20, initialEnergyOnIncremental: 0.3
+                }).run();
+            }
 
 
         } catch (err) {
@@ -1072,6 +1083,7 @@ function updateBotSelector(nodeId) {
     const screenshotImg = document.getElementById('feature-screenshot');
     const nextBtn = document.getElementById('screenshot-next-btn');
     const prevBtn = document.getElementById('screenshot-prev-btn');
+    const fullBtn = document.getElementById('screenshot-full-btn');
 
     if (!cy || !nodeId) {
         clearDetailsUI();
@@ -1161,14 +1173,7 @@ function updateBotSelector(nodeId) {
 
         // Show first image
         if (currentScreenshots.length > 0) {
-            // Fix path if it's relative and missing assets/
-            let src = currentScreenshots[0];
-            if (!src.startsWith('assets/') && !src.startsWith('http')) {
-                src = 'assets/screenshots/' + src;
-            }
-            // Add cache-busting query parameter
-            screenshotImg.src = src + '?v=' + new Date().getTime();
-
+            showScreenshot(currentScreenshots[0]);
             screenshotContainer.classList.remove('hidden');
         } else {
             screenshotImg.src = '';
@@ -1198,23 +1203,81 @@ function updateBotSelector(nodeId) {
     nextBtn.onclick = () => {
         if (currentScreenshots.length <= 1) return;
         currentScreenshotIndex = (currentScreenshotIndex + 1) % currentScreenshots.length;
-
-        let src = currentScreenshots[currentScreenshotIndex];
-        if (!src.startsWith('assets/') && !src.startsWith('http')) src = 'assets/screenshots/' + src;
-        // Add cache-busting query parameter
-        screenshotImg.src = src + '?v=' + new Date().getTime();
+        showScreenshot(currentScreenshots[currentScreenshotIndex]);
     };
 
     prevBtn.onclick = () => {
         if (currentScreenshots.length <= 1) return;
         // Wrap around logic: (index - 1 + length) % length
         currentScreenshotIndex = (currentScreenshotIndex - 1 + currentScreenshots.length) % currentScreenshots.length;
+        showScreenshot(currentScreenshots[currentScreenshotIndex]);
+    };
 
-        let src = currentScreenshots[currentScreenshotIndex];
+    // Full resolution only on request
+    const loadFull = () => {
+        if (currentScreenshots.length === 0) return;
+        showScreenshot(currentScreenshots[currentScreenshotIndex], true);
+    };
+    if (fullBtn) fullBtn.onclick = loadFull;
+    screenshotImg.onclick = loadFull;
+}
+
+/**
+ * Screenshot entries are either a plain file name or, once build_assets.py
+ * has run, an object with thumbnail and full-size WebP/AVIF variants
+ * (content-hashed, so they are cached without revalidation). The variants
+ * are build output, not checked in: `fallback` is the original file, shown
+ * if they are missing.
+ */
+function screenshotSources(entry, full) {
+    if (typeof entry === 'string') {
+        let src = entry;
         if (!src.startsWith('assets/') && !src.startsWith('http')) src = 'assets/screenshots/' + src;
-        // Add cache-busting query parameter
-        screenshotImg.src = src + '?v=' + new Date().getTime();
+        // Plain file names can be replaced in place: add cache-busting query parameter
+        return { src: src + '?v=' + new Date().getTime(), avif: null, width: null, height: null, canLoadFull: false, fallback: null };
+    }
+
+    const variant = full ? entry.full : entry.thumb;
+    return {
+        src: variant.webp || entry.src,
+        avif: variant.avif || null,
+        width: full ? entry.width : entry.thumb.width,
+        height: full ? entry.height : entry.thumb.height,
+        canLoadFull: !full,
+        fallback: entry.src
+    };
+}
+
+function showScreenshot(entry, full = false) {
+    const screenshotImg = document.getElementById('feature-screenshot');
+    const avifSource = document.getElementById('feature-screenshot-avif');
+    const fullBtn = document.getElementById('screenshot-full-btn');
+    const sources = screenshotSources(entry, full);
+
+    if (avifSource) {
+        if (sources.avif) avifSource.srcset = sources.avif;
+        else avifSource.removeAttribute('srcset');
+    }
+
+    // Known dimensions reserve the space before the image arrives
+    if (sources.width) {
+        screenshotImg.width = sources.width;
+        screenshotImg.height = sources.height;
+    } else {
+        screenshotImg.removeAttribute('width');
+        screenshotImg.removeAttribute('height');
+    }
+    // Variants not generated (build_assets.py not run): show the original
+    screenshotImg.onerror = () => {
+        screenshotImg.onerror = null;
+        if (!sources.fallback) return;
+        if (avifSource) avifSource.removeAttribute('srcset');
+        screenshotImg.src = sources.fallback;
+        if (fullBtn) fullBtn.classList.add('hidden');
     };
+    screenshotImg.src = sources.src;
+
+    if (fullBtn) fullBtn.classList.toggle('hidden', !sources.canLoadFull);
 }
 
 /**
@@ -1233,9 +1296,15 @@ function clearDetailsUI() {
     if (nextBtn) nextBtn.classList.add('hidden');
     if (prevBtn) prevBtn.classList.add('hidden');
 
+    const fullBtn = document.getElementById('screenshot-full-btn');
+    if (fullBtn) fullBtn.classList.add('hidden');
+    const avifSource = document.getElementById('feature-screenshot-avif');
+    if (avifSource) avifSource.removeAttribute('srcset');
+
     if (selector) selector.innerHTML = '<option value="">Select a Bot...</option>';
 
     if (screenshotImg) {
+        screenshotImg.onerror = null;
         screenshotImg.src = '';
         screenshotImg.removeAttribute('src'); // Ensure it's really gone
     }